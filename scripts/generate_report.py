@@ -11,21 +11,119 @@ This script creates an 18-page PDF report summarizing:
 """
 
 import argparse
+import hashlib
+import io
+from bisect import bisect_right
 import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from statistics import fmean
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 try:
+    import fpdf
     from fpdf import FPDF
     import matplotlib.pyplot as plt
     import matplotlib
+    import numpy as np
     matplotlib.use('Agg')  # Non-interactive backend
 except ImportError:
     print("ERROR: Required packages not installed. Run:")
     print("  pip install fpdf2 matplotlib pandas")
     exit(1)
 
+# The legacy PyFPDF package installs under the same "fpdf" name but builds the
+# document with string concatenation, which is quadratic in the report size.
+if not str(getattr(fpdf, 'FPDF_VERSION', '0')).startswith('2.'):
+    print(f"ERROR: fpdf2 is required, found fpdf {getattr(fpdf, 'FPDF_VERSION', 'unknown')}. Run:")
+    print("  pip uninstall fpdf && pip install fpdf2")
+    exit(1)
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Bump when load_result_summary's output changes, so cached summaries are rebuilt
+CACHE_VERSION = 1
+
+# Cached result summaries live under the user's cache directory by default
+DEFAULT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'htan_report'
+
+# Result files larger than this are streamed with ijson instead of parsed whole
+STREAM_THRESHOLD_BYTES = 1024 * 1024
+
+# "<experiment_id>_htan_<task>.json" (dot-files are skipped, as glob() does)
+RESULT_FILE_RE = re.compile(r'^([^.].*?)_htan_(.+)\.json$')
+
+# Top-level result fields used by the report (everything else is skipped)
+RESULT_FIELDS = ('task_name', 'model_id', 'timestamp', 'temperature', 'thinking')
+SCORE_RANGE_LABELS = ("0.0-0.2", "0.2-0.4", "0.4-0.6", "0.6-0.8", "0.8-1.0")
+SCORE_RANGE_BOUNDS = (0.2, 0.4, 0.6, 0.8)
+# Below this many scores bisect beats numpy's per-call array setup
+SCORE_RANGE_NUMPY_MIN = 128
+
+# Omit the SVG <metadata> block, which fpdf2's SVG renderer does not support
+SVG_METADATA = {'Creator': None, 'Date': None, 'Format': None, 'Type': None}
+
+
+@dataclass(slots=True)
+class TaskView:
+    """Flattened per-task fields used by the report pages."""
+
+    name: str
+    model_id: Any
+    timestamp: Any
+    temperature: Any
+    thinking: Any
+    total_samples: Any
+    avg_score: Any
+    success_rate: Any
+    min_score: Any
+    max_score: Any
+    num_scored: Any
+    duration: Any
+    token_usage: Optional[Dict[str, Any]]
+    score_hist: Optional[Dict[str, int]]
+    complexity: str = "N/A"  # Would need to load from original metadata
+
+    @classmethod
+    def from_raw(cls, name: str, result: Dict[str, Any]) -> "TaskView":
+        """Build a view from a loaded result summary."""
+        task_result = result.get('task_result', {})
+        metrics = task_result.get('metrics', {})
+        return cls(
+            name=name,
+            model_id=result.get('model_id', 'Unknown'),
+            timestamp=result.get('timestamp', 'Unknown'),
+            temperature=result.get('temperature', 'Unknown'),
+            thinking=result.get('thinking', False),
+            total_samples=metrics.get('total_samples', 0),
+            avg_score=metrics.get('average_score', 0),
+            success_rate=metrics.get('success_rate', 0),
+            min_score=metrics.get('min_score', 0),
+            max_score=metrics.get('max_score', 0),
+            num_scored=metrics.get('num_scored', 0),
+            duration=task_result.get('duration_seconds', 0),
+            token_usage=task_result.get('token_usage'),
+            score_hist=task_result.get('score_ranges'),
+        )
+
 
 class HTANBenchmarkReport(FPDF):
     """Custom PDF class for HTAN benchmarking reports."""
@@ -72,91 +170,232 @@ class HTANBenchmarkReport(FPDF):
             self.cell(col_widths[i], 7, header, 1, 0, 'C', True)
         self.ln()
 
-        # Data
+        # Data: format every cell up front, then emit rows with a bound cell()
+        # (fpdf2's cell() still handles page breaks and text encoding)
         self.set_font('Arial', '', 8)
-        for row in data:
-            for i, cell in enumerate(row):
-                self.cell(col_widths[i], 6, str(cell), 1, 0, 'L')
+        rows = [[str(value) for value in row] for row in data]
+        cell = self.cell
+        for row in rows:
+            for width, text in zip(col_widths, row):
+                cell(width, 6, text, 1, 0, 'L')
             self.ln()
         self.ln(3)
 
 
-def load_experiment_results(results_dir: Path, experiment_id: str = None) -> Dict[str, Any]:
-    """Load all HTAN task results for an experiment."""
+def load_experiment_results(results_dir: Path, experiment_id: str = None,
+                            cache_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Load all HTAN task results for an experiment.
+
+    If cache_dir is given (and msgpack is installed), the per-file summaries are
+    cached there and reused until the result file changes.
+    """
     task_results = {}
 
     if experiment_id:
-        # Load specific experiment
-        pattern = f"{experiment_id}_htan_*.json"
+        # Load specific experiment (a prefix test per name, no glob pattern)
+        prefix = f"{experiment_id}_htan_"
+        with os.scandir(results_dir) as it:
+            entries = [e for e in it if e.name.startswith(prefix) and e.name.endswith('.json')]
     else:
-        # Find most recent experiment
-        all_files = list(results_dir.glob("*_htan_*.json"))
-        if not all_files:
-            return {}
-
-        # Group by experiment ID (first part before _htan)
+        # Find most recent experiment, grouping files by experiment ID (the part
+        # before _htan). os.scandir hands back DirEntry objects, so no Path is
+        # built per file.
         experiments = {}
-        for f in all_files:
-            parts = f.stem.split("_htan_")
-            if len(parts) == 2:
-                exp_id = parts[0]
-                if exp_id not in experiments:
-                    experiments[exp_id] = []
-                experiments[exp_id].append(f)
+        all_files = []
+        with os.scandir(results_dir) as it:
+            for f in it:
+                match = RESULT_FILE_RE.match(f.name)
+                if match:
+                    experiments.setdefault(match.group(1), []).append(f)
+                    all_files.append(f)
 
         # Get most recent
         if not experiments:
             return {}
 
-        latest_exp_id = max(experiments.keys(),
-                          key=lambda k: max(f.stat().st_mtime for f in experiments[k]))
-        pattern = f"{latest_exp_id}_htan_*.json"
+        # stat() each file once rather than on every key comparison
+        mtimes = {f.path: f.stat().st_mtime for f in all_files}
+        latest_exp_id = max(experiments,
+                            key=lambda k: max(mtimes[f.path] for f in experiments[k]))
         experiment_id = latest_exp_id
-
-    # Load all task results
-    for result_file in results_dir.glob(pattern):
-        try:
-            data = json.loads(result_file.read_text())
+        # Reuse the entries from the scan above instead of listing the directory again
+        entries = experiments[latest_exp_id]
+
+    # Load all task results (sorted so the output order is deterministic)
+    result_files = [Path(e.path) for e in sorted(entries, key=attrgetter('name'))]
+    if not result_files:
+        return task_results
+
+    max_workers = min(32, (os.cpu_count() or 1) * 4, len(result_files))
+    if msgpack is None:
+        cache_dir = None
+    elif cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def load_one(result_file: Path) -> Optional[Dict[str, Any]]:
+        return _load_one(result_file, cache_dir)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for result_file, data in zip(result_files, executor.map(load_one, result_files)):
+            if data is None:
+                continue
             task_name = data.get('task_name', result_file.stem.split('_', 1)[1])
             task_results[task_name] = data
-        except Exception as e:
-            print(f"Warning: Could not load {result_file}: {e}")
 
     return task_results
 
 
-def generate_summary_page(pdf: HTANBenchmarkReport, results: Dict[str, Any]):
+def _load_one(result_file: Path, cache_dir: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Load one result file for the thread pool, returning None on failure."""
+    try:
+        if cache_dir is None:
+            return load_result_summary(result_file)
+        return load_cached_result_summary(result_file, cache_dir)
+    except Exception as e:
+        print(f"Warning: Could not load {result_file}: {e}")
+        return None
+
+
+def load_cached_result_summary(result_file: Path, cache_dir: Path) -> Dict[str, Any]:
+    """
+    Load a result summary from the msgpack cache, rebuilding it on a miss.
+
+    There is one entry per result file, named after a hash of its resolved
+    path (so results directories with the same file names never share
+    entries). The entry records the file's mtime and size; an edited file
+    fails that check and its entry is overwritten in place.
+    """
+    stat = result_file.stat()
+    key = str(result_file.resolve())
+    cache_path = cache_dir / (hashlib.sha256(key.encode()).hexdigest() + '.msgpack')
+    try:
+        cached = msgpack.unpackb(cache_path.read_bytes(), raw=False)
+        if (isinstance(cached, dict) and cached.get('version') == CACHE_VERSION
+                and cached.get('mtime_ns') == stat.st_mtime_ns and cached.get('size') == stat.st_size):
+            return cached['summary']
+    except (OSError, ValueError, KeyError, msgpack.UnpackException):
+        pass
+
+    summary = load_result_summary(result_file)
+    try:
+        cache_path.write_bytes(msgpack.packb({
+            'version': CACHE_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'summary': summary
+        }))
+    except OSError as e:
+        print(f"Warning: Could not write cache {cache_path}: {e}")
+    return summary
+
+
+def compute_score_ranges(scores) -> Dict[str, int]:
+    """Bucket per-sample scores into the five report score ranges (None is skipped)."""
+    values = [score for score in scores if score is not None]
+    if len(values) < SCORE_RANGE_NUMPY_MIN:
+        counts = [0] * len(SCORE_RANGE_LABELS)
+        for score in values:
+            counts[bisect_right(SCORE_RANGE_BOUNDS, score)] += 1
+        return dict(zip(SCORE_RANGE_LABELS, counts))
+    indices = np.digitize(np.asarray(values, dtype=np.float64), SCORE_RANGE_BOUNDS)
+    counts = np.bincount(indices, minlength=len(SCORE_RANGE_LABELS))
+    return dict(zip(SCORE_RANGE_LABELS, counts.tolist()))
+
+
+def summarize_result(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a parsed result document to the fields the report uses.
+
+    The per-sample ``results`` list is replaced by its ``score_ranges`` histogram.
+    """
+    summary = {key: data[key] for key in RESULT_FIELDS if key in data}
+    task_result = data.get('task_result', {})
+    summary['task_result'] = {
+        key: task_result[key]
+        for key in ('metrics', 'token_usage', 'duration_seconds')
+        if key in task_result
+    }
+    sample_results = task_result.get('results', [])
+    if sample_results:
+        summary['task_result']['score_ranges'] = compute_score_ranges(
+            sample.get('score', 0) for sample in sample_results
+        )
+    return summary
+
+
+def stream_result_summary(result_file: Path) -> Dict[str, Any]:
+    """
+    Build the same summary as summarize_result() with an incremental ijson parse.
+
+    Only the top-level fields, metrics, token usage and per-sample scores are
+    materialized; sample inputs, responses and tool histories are skipped.
+    """
+    summary = {}
+    task_result = {}
+    builders = {}
+    scores = []
+    num_samples = 0
+
+    with open(result_file, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix == 'task_result.results.item.score':
+                scores.append(value)
+            elif prefix == 'task_result.results.item' and event == 'start_map':
+                num_samples += 1
+            elif prefix.startswith('task_result.results'):
+                continue
+            elif prefix in RESULT_FIELDS and event not in ('start_map', 'start_array', 'map_key'):
+                summary[prefix] = value
+            elif prefix == 'task_result.duration_seconds':
+                task_result['duration_seconds'] = value
+            elif prefix.startswith(('task_result.metrics', 'task_result.token_usage')):
+                key = prefix.split('.')[1]
+                if key in ('metrics', 'token_usage'):
+                    builders.setdefault(key, ijson.ObjectBuilder()).event(event, value)
+
+    for key, builder in builders.items():
+        task_result[key] = builder.value
+    if num_samples:
+        # Samples without a score key count as 0, matching summarize_result()
+        scores.extend([0] * (num_samples - len(scores)))
+        task_result['score_ranges'] = compute_score_ranges(scores)
+    summary['task_result'] = task_result
+    return summary
+
+
+def load_result_summary(result_file: Path) -> Dict[str, Any]:
+    """Load the report summary for a single result file."""
+    if ijson is not None and result_file.stat().st_size >= STREAM_THRESHOLD_BYTES:
+        return stream_result_summary(result_file)
+    if orjson is not None:
+        return summarize_result(orjson.loads(result_file.read_bytes()))
+    return summarize_result(json.loads(result_file.read_text()))
+
+
+def generate_summary_page(pdf: HTANBenchmarkReport, views: List[TaskView]):
     """Page 1: Executive Summary."""
     pdf.add_page()
     pdf.chapter_title("Executive Summary")
 
-    # Get first result for metadata
-    first_result = list(results.values())[0] if results else {}
-
-    # Experiment metadata
+    # Experiment metadata (taken from the first task)
     pdf.section_title("Experiment Configuration")
-    model_id = first_result.get('model_id', 'Unknown')
-    timestamp = first_result.get('timestamp', 'Unknown')
-    temperature = first_result.get('temperature', 'Unknown')
-    thinking = first_result.get('thinking', False)
-
-    pdf.body_text(f"Model: {model_id}")
-    pdf.body_text(f"Timestamp: {timestamp}")
-    pdf.body_text(f"Temperature: {temperature}")
-    pdf.body_text(f"Thinking Mode: {'Enabled' if thinking else 'Disabled'}")
+    first = views[0]
+
+    pdf.body_text(f"Model: {first.model_id}")
+    pdf.body_text(f"Timestamp: {first.timestamp}")
+    pdf.body_text(f"Temperature: {first.temperature}")
+    pdf.body_text(f"Thinking Mode: {'Enabled' if first.thinking else 'Disabled'}")
     pdf.ln(5)
 
     # Overall performance
     pdf.section_title("Overall Performance")
 
-    total_samples = sum(r.get('task_result', {}).get('metrics', {}).get('total_samples', 0)
-                       for r in results.values())
-    avg_score = sum(r.get('task_result', {}).get('metrics', {}).get('average_score', 0)
-                   for r in results.values()) / len(results) if results else 0
-    success_rate = sum(r.get('task_result', {}).get('metrics', {}).get('success_rate', 0)
-                      for r in results.values()) / len(results) if results else 0
+    total_samples = sum(v.total_samples for v in views)
+    avg_score = fmean(v.avg_score for v in views)
+    success_rate = fmean(v.success_rate for v in views)
 
-    pdf.body_text(f"Tasks Evaluated: {len(results)}")
+    pdf.body_text(f"Tasks Evaluated: {len(views)}")
     pdf.body_text(f"Total Samples: {total_samples}")
     pdf.body_text(f"Average Score: {avg_score:.3f} (0.0-1.0 scale)")
     pdf.body_text(f"Success Rate: {success_rate:.1%}")
@@ -165,13 +404,11 @@ def generate_summary_page(pdf: HTANBenchmarkReport, results: Dict[str, Any]):
     # Best and worst performing tasks
     pdf.section_title("Performance Highlights")
 
-    task_scores = [(name, r.get('task_result', {}).get('metrics', {}).get('average_score', 0))
-                   for name, r in results.items()]
-    task_scores.sort(key=lambda x: x[1], reverse=True)
-
-    if task_scores:
-        pdf.body_text(f"Best Performing: {task_scores[0][0]} ({task_scores[0][1]:.3f})")
-        pdf.body_text(f"Lowest Performing: {task_scores[-1][0]} ({task_scores[-1][1]:.3f})")
+    if views:
+        best = max(views, key=attrgetter('avg_score'))
+        worst = min(reversed(views), key=attrgetter('avg_score'))
+        pdf.body_text(f"Best Performing: {best.name} ({best.avg_score:.3f})")
+        pdf.body_text(f"Lowest Performing: {worst.name} ({worst.avg_score:.3f})")
 
     pdf.ln(5)
     pdf.body_text("This report provides detailed analysis of LLM performance on HTAN metadata "
@@ -179,7 +416,7 @@ def generate_summary_page(pdf: HTANBenchmarkReport, results: Dict[str, Any]):
                  "for structured data and Jaccard similarity for free-text fields.")
 
 
-def generate_overview_page(pdf: HTANBenchmarkReport, results: Dict[str, Any], charts_dir: Path):
+def generate_overview_page(pdf: HTANBenchmarkReport, views: List[TaskView]):
     """Page 2: Task Performance Overview."""
     pdf.add_page()
     pdf.chapter_title("Task Performance Overview")
@@ -188,19 +425,13 @@ def generate_overview_page(pdf: HTANBenchmarkReport, results: Dict[str, Any], ch
     headers = ["Task", "Complexity", "Samples", "Avg Score", "Success %"]
     data = []
 
-    for task_name, result in sorted(results.items()):
-        task_result = result.get('task_result', {})
-        metrics = task_result.get('metrics', {})
-
-        # Extract complexity from metadata if available
-        complexity = "N/A"  # Would need to load from original metadata
-
+    for view in views:
         row = [
-            task_name.replace('htan_', ''),
-            complexity,
-            str(metrics.get('total_samples', 0)),
-            f"{metrics.get('average_score', 0):.3f}",
-            f"{metrics.get('success_rate', 0) * 100:.1f}"
+            view.name.replace('htan_', ''),
+            view.complexity,
+            str(view.total_samples),
+            f"{view.avg_score:.3f}",
+            f"{view.success_rate * 100:.1f}"
         ]
         data.append(row)
 
@@ -210,56 +441,58 @@ def generate_overview_page(pdf: HTANBenchmarkReport, results: Dict[str, Any], ch
     pdf.ln(5)
     pdf.section_title("Performance Visualization")
 
-    # Bar chart: Average score by task
-    chart_file = charts_dir / "scores_by_task.png"
-    task_names = [r.replace('htan_', '') for r in results.keys()]
-    scores = [results[r].get('task_result', {}).get('metrics', {}).get('average_score', 0)
-             for r in results.keys()]
-
-    plt.figure(figsize=(10, 6))
-    plt.barh(task_names, scores)
-    plt.xlabel('Average Score')
-    plt.title('Average Score by Task')
-    plt.xlim(0, 1.0)
-    plt.tight_layout()
-    plt.savefig(chart_file, dpi=150, bbox_inches='tight')
-    plt.close()
-
-    pdf.image(str(chart_file), x=10, w=190)
-
-
-def generate_task_detail_pages(pdf: HTANBenchmarkReport, results: Dict[str, Any]):
+    # Bar chart: Average score by task (SVG so fpdf2 embeds it as vector paths)
+    task_names = [v.name.replace('htan_', '') for v in views]
+    scores = [v.avg_score for v in views]
+
+    # One figure for the page; further charts should ax.clear() and redraw on it.
+    # bbox_inches='tight' already fits the labels, so tight_layout() is not needed.
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(task_names, scores)
+    ax.set_xlabel('Average Score')
+    ax.set_title('Average Score by Task')
+    ax.set_xlim(0, 1.0)
+    chart = io.BytesIO()
+    fig.savefig(chart, format='svg', bbox_inches='tight',
+                metadata=SVG_METADATA)
+    plt.close(fig)
+    chart.seek(0)
+
+    # SVG text has no explicit fill, so reset the fill left gray by the table header
+    pdf.set_fill_color(0, 0, 0)
+    pdf.image(chart, x=10, w=190)
+
+
+def generate_task_detail_pages(pdf: HTANBenchmarkReport, views: List[TaskView]):
     """Pages 3-15: Detailed results per task."""
-    for task_name, result in sorted(results.items()):
+    for view in views:
+        task_name = view.name
         pdf.add_page()
         pdf.chapter_title(f"Task: {task_name}")
 
-        task_result = result.get('task_result', {})
-        metrics = task_result.get('metrics', {})
-
         # Task overview
         pdf.section_title("Overview")
         pdf.body_text(f"Schema Type: {task_name.replace('htan_', '').replace('_', ' ').title()}")
-        pdf.body_text(f"Total Samples: {metrics.get('total_samples', 0)}")
-        pdf.body_text(f"Duration: {task_result.get('duration_seconds', 0):.1f} seconds")
+        pdf.body_text(f"Total Samples: {view.total_samples}")
+        pdf.body_text(f"Duration: {view.duration:.1f} seconds")
         pdf.ln(3)
 
         # Performance metrics
         pdf.section_title("Performance Metrics")
         headers = ["Metric", "Value"]
         data = [
-            ["Average Score", f"{metrics.get('average_score', 0):.3f}"],
-            ["Min Score", f"{metrics.get('min_score', 0):.3f}"],
-            ["Max Score", f"{metrics.get('max_score', 0):.3f}"],
-            ["Success Rate", f"{metrics.get('success_rate', 0) * 100:.1f}%"],
-            ["Samples Scored", f"{metrics.get('num_scored', 0)}"]
+            ["Average Score", f"{view.avg_score:.3f}"],
+            ["Min Score", f"{view.min_score:.3f}"],
+            ["Max Score", f"{view.max_score:.3f}"],
+            ["Success Rate", f"{view.success_rate * 100:.1f}%"],
+            ["Samples Scored", f"{view.num_scored}"]
         ]
         pdf.add_table(headers, data, col_widths=[95, 95])
 
         # Token usage
-        if 'token_usage' in task_result:
+        if view.token_usage is not None:
             pdf.section_title("Token Usage")
-            tokens = task_result['token_usage']
+            tokens = view.token_usage
             pdf.body_text(f"Input Tokens: {tokens.get('input_tokens', 0):,}")
             pdf.body_text(f"Output Tokens: {tokens.get('output_tokens', 0):,}")
             pdf.body_text(f"Total Tokens: {tokens.get('total_tokens', 0):,}")
@@ -267,24 +500,8 @@ def generate_task_detail_pages(pdf: HTANBenchmarkReport, results: Dict[str, Any]
 
         # Sample-level results summary
         pdf.section_title("Sample Results Distribution")
-        sample_results = task_result.get('results', [])
-        if sample_results:
-            score_ranges = {"0.0-0.2": 0, "0.2-0.4": 0, "0.4-0.6": 0,
-                          "0.6-0.8": 0, "0.8-1.0": 0}
-            for sample in sample_results:
-                score = sample.get('score', 0)
-                if score is not None:
-                    if score < 0.2:
-                        score_ranges["0.0-0.2"] += 1
-                    elif score < 0.4:
-                        score_ranges["0.2-0.4"] += 1
-                    elif score < 0.6:
-                        score_ranges["0.4-0.6"] += 1
-                    elif score < 0.8:
-                        score_ranges["0.6-0.8"] += 1
-                    else:
-                        score_ranges["0.8-1.0"] += 1
-
+        score_ranges = view.score_hist
+        if score_ranges:
             headers = ["Score Range", "Count"]
             data = [[k, str(v)] for k, v in score_ranges.items()]
             pdf.add_table(headers, data, col_widths=[95, 95])
@@ -344,20 +561,15 @@ def generate_methodology_page(pdf: HTANBenchmarkReport):
     pdf.body_text("Final Record Score = (1.0 + 0.0 + 0.5) / 3 = 0.50")
 
 
-def generate_recommendations_page(pdf: HTANBenchmarkReport, results: Dict[str, Any]):
+def generate_recommendations_page(pdf: HTANBenchmarkReport, views: List[TaskView]):
     """Page 18: Recommendations."""
     pdf.add_page()
     pdf.chapter_title("Recommendations & Insights")
 
-    # Calculate some statistics
-    low_performing = [(name, r.get('task_result', {}).get('metrics', {}).get('average_score', 0))
-                     for name, r in results.items()]
-    low_performing = [t for t in low_performing if t[1] < 0.7]
-    low_performing.sort(key=lambda x: x[1])
-
-    high_performing = [(name, r.get('task_result', {}).get('metrics', {}).get('average_score', 0))
-                      for name, r in results.items()]
-    high_performing = [t for t in high_performing if t[1] >= 0.9]
+    # Calculate some statistics (one pass over the views, then partition)
+    scored = [(v.name, v.avg_score) for v in views]
+    low_performing = sorted((t for t in scored if t[1] < 0.7), key=itemgetter(1))
+    high_performing = [t for t in scored if t[1] >= 0.9]
 
     # Insights
     pdf.section_title("Key Insights")
@@ -418,6 +630,10 @@ def main():
     parser.add_argument("--results-dir", type=str,
                        default="curator-benchmarking/docs/results",
                        help="Results directory")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR),
+                       help="Directory for cached result summaries")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Re-parse every result file instead of using the cache")
 
     args = parser.parse_args()
 
@@ -432,7 +648,8 @@ def main():
 
     # Load results
     print("Loading experiment results...")
-    results = load_experiment_results(results_dir, args.experiment_id)
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+    results = load_experiment_results(results_dir, args.experiment_id, cache_dir)
 
     if not results:
         print("ERROR: No HTAN task results found")
@@ -440,33 +657,33 @@ def main():
         return
 
     print(f"Found {len(results)} task results")
-
-    # Create temporary directory for charts
-    charts_dir = Path("/tmp/htan_charts")
-    charts_dir.mkdir(exist_ok=True)
+    # Sorted by task name once here; every page generator keeps this order
+    views = sorted((TaskView.from_raw(name, result) for name, result in results.items()),
+                   key=attrgetter('name'))
 
     # Generate report
     print("Generating PDF report...")
     pdf = HTANBenchmarkReport()
 
     print("  - Executive Summary")
-    generate_summary_page(pdf, results)
+    generate_summary_page(pdf, views)
 
     print("  - Task Performance Overview")
-    generate_overview_page(pdf, results, charts_dir)
+    generate_overview_page(pdf, views)
 
     print("  - Detailed Task Results")
-    generate_task_detail_pages(pdf, results)
+    generate_task_detail_pages(pdf, views)
 
     print("  - Scoring Methodology")
     generate_methodology_page(pdf)
 
     print("  - Recommendations")
-    generate_recommendations_page(pdf, results)
+    generate_recommendations_page(pdf, views)
 
     # Save PDF
     output_path = Path(args.output)
-    pdf.output(str(output_path))
+    with open(output_path, 'wb') as f:
+        f.write(pdf.output())
 
     print(f"\n✓ Report generated: {output_path.absolute()}")
     print(f"  Pages: {pdf.page_no()}")
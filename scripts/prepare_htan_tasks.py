@@ -9,39 +9,99 @@ This script:
 5. Generates default_prompt.txt, format_prompt.py, and score.py for each task
 """
 
+import hashlib
 import json
+import os
 import shutil
-import urllib.request
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any
 
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _loads(data):
+    """Parse JSON text or bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_indented(obj: Any) -> bytes:
+    """
+    Pretty-print JSON (2-space indent) as UTF-8 bytes, with orjson when installed.
+
+    Falls back to json.dumps, whose output escapes non-ASCII, if orjson's would
+    not be pure ASCII, so schema files read the same under any locale, and for
+    values orjson rejects (e.g. integers wider than 64 bits).
+    """
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+            if data.isascii():
+                return data
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, indent=2).encode("utf-8")
+
 # Paths
 REPO_ROOT = Path(__file__).parent.parent.parent
 SYNTHETIC_DATA_ROOT = REPO_ROOT / "benchmarking/sim-input/synthetic-data/htan2/v1.2.0"
 TASKS_ROOT = REPO_ROOT / "curator-benchmarking/tasks"
 SCRIPTS_DIR = Path(__file__).parent
 
-# Schema cache to avoid repeated downloads
-_schema_cache: Dict[str, Dict[str, Any]] = {}
+# On-disk schema cache so repeated runs skip the network
+SCHEMA_CACHE_DIR = SCRIPTS_DIR / ".schema_cache"
+
+# Tasks are created on up to this many threads
+MAX_WORKERS = 16
 
+# One HTTP session for all schema downloads: connections are kept alive and
+# reused, and responses come gzip/deflate-compressed (requests sends
+# Accept-Encoding and decodes transparently). The pool is sized for MAX_WORKERS.
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_maxsize=MAX_WORKERS))
+_http.mount("http://", HTTPAdapter(pool_maxsize=MAX_WORKERS))
 
+
+@lru_cache(maxsize=None)
 def fetch_schema(uri: str) -> Dict[str, Any]:
-    """Fetch JSON schema from URI with caching."""
-    if uri in _schema_cache:
-        return _schema_cache[uri]
+    """Fetch JSON schema from URI, cached in-process and on disk across runs."""
+    cache_path = SCHEMA_CACHE_DIR / f"{hashlib.sha1(uri.encode()).hexdigest()}.json"
+    if cache_path.exists():
+        return _loads(cache_path.read_bytes())
 
     try:
-        with urllib.request.urlopen(uri) as response:
-            if response.status != 200:
-                raise Exception(f"HTTP {response.status} fetching schema from {uri}")
-            schema = json.load(response)
+        response = _http.get(uri, timeout=60)
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code} fetching schema from {uri}")
+        raw = response.content
+        schema = _loads(raw)
     except Exception as exc:
         raise Exception(f"Failed to fetch schema from {uri}: {exc}")
 
-    _schema_cache[uri] = schema
+    # Write via a temp file + rename so an interrupted run never leaves a
+    # truncated cache entry behind
+    SCHEMA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=SCHEMA_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_path, cache_path)
     return schema
 
 
+# JSON schema types that are always scored by exact match
+STRUCTURED_TYPES = frozenset(("integer", "number", "boolean"))
+
+
 def classify_field_types(schema: Dict[str, Any]) -> Dict[str, str]:
     """
     Classify each field as 'structured' or 'text'.
@@ -65,7 +125,7 @@ def classify_field_types(schema: Dict[str, Any]) -> Dict[str, str]:
 
         # Check for numeric/boolean types
         prop_type = prop_schema.get("type", "string")
-        if prop_type in ["integer", "number", "boolean"]:
+        if prop_type in STRUCTURED_TYPES:
             field_types[prop_name] = "structured"
             continue
 
@@ -87,7 +147,26 @@ def generate_score_py(schema: Dict[str, Any]) -> str:
     return '''"""Custom scorer for HTAN data correction task using hybrid metric."""
 import json
 import re
-from typing import Dict, Any, Optional, Set
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON schema types that are always scored by exact match
+_STRUCTURED_TYPES = frozenset(("integer", "number", "boolean"))
+
+# Markdown code fences stripped from predictions before JSON extraction
+_JSON_FENCE_RE = re.compile(r'```json\\s*\\n?')
+_FENCE_RE = re.compile(r'```\\s*\\n?')
+
+# (field types, text field names) per schema object; the schema is kept
+# alive so its id stays unique, and only the most recent schemas are kept
+# (a run scores one task's schema, so this never grows past a handful)
+_SCHEMA_CACHE_SIZE = 8
+_field_types_cache: Dict[int, Tuple[Dict[str, Any], Tuple[Dict[str, str], FrozenSet[str]]]] = {}
 
 
 def jaccard_similarity(text1: str, text2: str) -> float:
@@ -102,22 +181,25 @@ def jaccard_similarity(text1: str, text2: str) -> float:
     if not text1 or not text2:
         return 0.0
 
-    # Normalize: lowercase, split on whitespace
-    words1 = set(str(text1).lower().split())
-    words2 = set(str(text2).lower().split())
+    # Normalize: lowercase, split on whitespace (text2 is the ground truth,
+    # whose values repeat across samples, so its word set is cached)
+    words1 = frozenset(str(text1).lower().split())
+    words2 = _word_set(str(text2))
 
     if not words1 and not words2:
         return 1.0
     if not words1 or not words2:
         return 0.0
 
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
+    # |A ∪ B| = |A| + |B| - |A ∩ B|, so the union set is never built
+    intersection = len(words1 & words2)
+    return intersection / (len(words1) + len(words2) - intersection)
 
-    if not union:
-        return 0.0
 
-    return len(intersection) / len(union)
+@lru_cache(maxsize=4096)
+def _word_set(text: str) -> FrozenSet[str]:
+    """Lowercased word set of a text value."""
+    return frozenset(text.lower().split())
 
 
 def classify_field_type(prop_name: str, prop_schema: Dict[str, Any]) -> str:
@@ -137,7 +219,7 @@ def classify_field_type(prop_name: str, prop_schema: Dict[str, Any]) -> str:
 
     # Check for numeric/boolean types
     prop_type = prop_schema.get("type", "string")
-    if prop_type in ["integer", "number", "boolean"]:
+    if prop_type in _STRUCTURED_TYPES:
         return "structured"
 
     # Check for arrays with enum items
@@ -151,31 +233,87 @@ def classify_field_type(prop_name: str, prop_schema: Dict[str, Any]) -> str:
 
 
 def load_field_types(schema: Dict[str, Any]) -> Dict[str, str]:
-    """Build field type mapping from schema properties."""
+    """Build field type mapping from schema properties (classified once per schema)."""
+    return _classify_schema(schema)[0]
+
+
+def _text_fields(schema: Dict[str, Any]) -> FrozenSet[str]:
+    """Names of the schema's free-text fields; every other key is exact-match."""
+    return _classify_schema(schema)[1]
+
+
+def _classify_schema(schema: Dict[str, Any]) -> Tuple[Dict[str, str], FrozenSet[str]]:
+    """Classify a schema's fields once and cache the result on the schema object."""
+    cached = _field_types_cache.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
     field_types = {}
     properties = schema.get("properties", {})
 
     for prop_name, prop_schema in properties.items():
         field_types[prop_name] = classify_field_type(prop_name, prop_schema)
 
-    return field_types
+    classified = (
+        field_types,
+        frozenset(name for name, field_type in field_types.items() if field_type == "text")
+    )
+    if len(_field_types_cache) >= _SCHEMA_CACHE_SIZE:
+        del _field_types_cache[next(iter(_field_types_cache))]
+    _field_types_cache[id(schema)] = (schema, classified)
+    return classified
+
+
+def _parse_json(text: str) -> Any:
+    """
+    Parse JSON text, with orjson when it is installed.
+
+    orjson is stricter than the json module (no NaN/Infinity, no lone
+    surrogates), so anything it rejects goes through json.loads and is
+    scored exactly as before.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
 
 
 def _extract_json(text: str) -> Optional[str]:
-    """Extract JSON from text, handling markdown code blocks."""
-    # Remove markdown code blocks
-    text = re.sub(r'```json\\s*\\n?', '', text)
-    text = re.sub(r'```\\s*\\n?', '', text)
+    """
+    Extract the JSON object from text, handling markdown code blocks.
+
+    Returns None when the text has no {...} span, since it cannot hold an
+    object and parsing it would be wasted work.
+    """
+    # Remove markdown code blocks (skipped when there are no fences at all)
+    if '```' in text:
+        text = _JSON_FENCE_RE.sub('', text)
+        text = _FENCE_RE.sub('', text)
     text = text.strip()
 
     # Try to find JSON object boundaries
-    start = text.find('{')
-    end = text.rfind('}')
+    span = _find_json_span(text)
+    if span is None:
+        return None
+    return text[span[0]:span[1]]
 
-    if start != -1 and end != -1 and end > start:
-        return text[start:end+1]
 
-    return text
+def _find_json_span(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Return (start, end) slice indices from the first '{' to the last '}'.
+
+    Both scans run in C; the reverse scan is skipped when there is no '{'
+    and stops at the opening brace. Returns None if there is no such span.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    end = text.rfind('}', start)
+    if end == -1:
+        return None
+    return start, end + 1
 
 
 def score(
@@ -192,14 +330,14 @@ def score(
     Returns weighted average across all fields.
     """
     try:
-        # Extract JSON from prediction
+        # Extract JSON from prediction (no object at all scores 0)
         json_str = _extract_json(prediction)
-        if not json_str:
+        if json_str is None:
             return 0.0
 
         # Parse prediction
         try:
-            pred_dict = json.loads(json_str)
+            pred_dict = _parse_json(json_str)
         except (json.JSONDecodeError, TypeError):
             return 0.0
 
@@ -208,23 +346,26 @@ def score(
         if input_data and "_schema" in input_data:
             schema = input_data["_schema"]
 
-        # Classify field types
-        field_types = load_field_types(schema) if schema else {}
+        # Free-text fields (everything else, including fields missing from the
+        # schema or all fields if there is no schema, is structured)
+        text_fields = _text_fields(schema) if schema else frozenset()
 
         # Calculate scores per field
         all_keys = set(pred_dict.keys()) | set(ground_truth.keys())
         if not all_keys:
             return 1.0
 
+        if not text_fields:
+            # Exact match on every field: the score is the fraction of matches
+            matches = sum(1 for key in all_keys if pred_dict.get(key) == ground_truth.get(key))
+            return matches / len(all_keys)
+
         field_scores = []
         for key in all_keys:
             pred_val = pred_dict.get(key)
             truth_val = ground_truth.get(key)
 
-            # Determine field type (default to structured if schema not available)
-            field_type = field_types.get(key, "structured")
-
-            if field_type == "structured":
+            if key not in text_fields:
                 # Exact match for structured fields
                 if pred_val == truth_val:
                     field_scores.append(1.0)
@@ -250,7 +391,106 @@ def generate_format_prompt_py() -> str:
     """Generate format_prompt.py content."""
     return '''"""Custom prompt formatter for HTAN correction tasks."""
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Schema text per schema object (the schema is kept alive so its id stays
+# unique); only the most recent schemas are kept
+_SCHEMA_CACHE_SIZE = 8
+_schema_text_cache: Dict[int, Tuple[Dict[str, Any], str]] = {}
+
+
+def _dumps_indented(obj: Any) -> str:
+    """
+    Same text as json.dumps(obj, indent=2), via orjson when it is installed.
+
+    orjson writes non-ASCII characters unescaped, so that case goes through
+    json.dumps to keep the prompt text identical.
+    """
+    if orjson is not None:
+        try:
+            text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+            if text.isascii():
+                return text
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, indent=2)
+
+
+def _simplified_schema_text(schema: Dict[str, Any]) -> str:
+    """
+    Build the "Target Schema" prompt section for a schema.
+
+    The schema is the same for every sample of a task, so the text is built
+    once per schema object and reused.
+    """
+    cached = _schema_text_cache.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    simplified_schema = {
+        "type": "object",
+        "properties": {}
+    }
+
+    properties = schema["properties"]
+    for prop_name, prop_def in properties.items():
+        field_info = {
+            "type": prop_def.get("type", "string")
+        }
+
+        # Add description (truncated)
+        if "description" in prop_def:
+            desc = prop_def["description"]
+            field_info["description"] = desc[:100] + "..." if len(desc) > 100 else desc
+
+        # Include enum values (limit to 20 if very large)
+        if "enum" in prop_def:
+            enum_values = prop_def["enum"]
+            if len(enum_values) > 20:
+                field_info["enum_preview"] = enum_values[:20]
+                field_info["enum_count"] = len(enum_values)
+                field_info["enum_note"] = f"Controlled vocabulary with {len(enum_values)} values. First 20 shown."
+            else:
+                field_info["enum"] = enum_values
+
+        # Include pattern for ID validation
+        if "pattern" in prop_def:
+            field_info["pattern"] = prop_def["pattern"]
+
+        # Include range constraints
+        if "minimum" in prop_def:
+            field_info["minimum"] = prop_def["minimum"]
+        if "maximum" in prop_def:
+            field_info["maximum"] = prop_def["maximum"]
+
+        # Include array item constraints
+        if "items" in prop_def and prop_def.get("type") == "array":
+            items = prop_def["items"]
+            if "enum" in items:
+                enum_values = items["enum"]
+                if len(enum_values) > 20:
+                    field_info["items_enum_preview"] = enum_values[:20]
+                    field_info["items_enum_count"] = len(enum_values)
+                else:
+                    field_info["items_enum"] = enum_values
+
+        simplified_schema["properties"][prop_name] = field_info
+
+    # Add required fields info
+    if "required" in schema:
+        simplified_schema["required"] = schema["required"]
+
+    schema_text = f"\\n\\nTarget Schema:\\n{_dumps_indented(simplified_schema)}"
+
+    if len(_schema_text_cache) >= _SCHEMA_CACHE_SIZE:
+        del _schema_text_cache[next(iter(_schema_text_cache))]
+    _schema_text_cache[id(schema)] = (schema, schema_text)
+    return schema_text
 
 
 def format_prompt(
@@ -270,60 +510,7 @@ def format_prompt(
     # Build simplified schema showing key validation rules
     schema_text = ""
     if schema and "properties" in schema:
-        simplified_schema = {
-            "type": "object",
-            "properties": {}
-        }
-
-        properties = schema["properties"]
-        for prop_name, prop_def in properties.items():
-            field_info = {
-                "type": prop_def.get("type", "string")
-            }
-
-            # Add description (truncated)
-            if "description" in prop_def:
-                desc = prop_def["description"]
-                field_info["description"] = desc[:100] + "..." if len(desc) > 100 else desc
-
-            # Include enum values (limit to 20 if very large)
-            if "enum" in prop_def:
-                enum_values = prop_def["enum"]
-                if len(enum_values) > 20:
-                    field_info["enum_preview"] = enum_values[:20]
-                    field_info["enum_count"] = len(enum_values)
-                    field_info["enum_note"] = f"Controlled vocabulary with {len(enum_values)} values. First 20 shown."
-                else:
-                    field_info["enum"] = enum_values
-
-            # Include pattern for ID validation
-            if "pattern" in prop_def:
-                field_info["pattern"] = prop_def["pattern"]
-
-            # Include range constraints
-            if "minimum" in prop_def:
-                field_info["minimum"] = prop_def["minimum"]
-            if "maximum" in prop_def:
-                field_info["maximum"] = prop_def["maximum"]
-
-            # Include array item constraints
-            if "items" in prop_def and prop_def.get("type") == "array":
-                items = prop_def["items"]
-                if "enum" in items:
-                    enum_values = items["enum"]
-                    if len(enum_values) > 20:
-                        field_info["items_enum_preview"] = enum_values[:20]
-                        field_info["items_enum_count"] = len(enum_values)
-                    else:
-                        field_info["items_enum"] = enum_values
-
-            simplified_schema["properties"][prop_name] = field_info
-
-        # Add required fields info
-        if "required" in schema:
-            simplified_schema["required"] = schema["required"]
-
-        schema_text = f"\\n\\nTarget Schema:\\n{json.dumps(simplified_schema, indent=2)}"
+        schema_text = _simplified_schema_text(schema)
 
     # Format input data
     sample_text = f"\\n\\nInput Data (with errors to correct):\\n{json.dumps(sample, indent=2)}"
@@ -388,6 +575,12 @@ Output Format:
 Return ONLY the JSON. No explanation needed.'''
 
 
+# Generated sources are the same for every task (generate_score_py does not
+# specialize on the schema yet), so they are rendered and encoded once
+SCORE_PY_BYTES = generate_score_py({}).encode("utf-8")
+FORMAT_PROMPT_PY_BYTES = generate_format_prompt_py().encode("utf-8")
+
+
 def create_task(dataset_dir: Path, task_name: str):
     """Create a single HTAN benchmarking task."""
     print(f"\nProcessing {task_name}...")
@@ -403,14 +596,14 @@ def create_task(dataset_dir: Path, task_name: str):
         print(f"  WARNING: metadata.json not found in {dataset_dir}")
         metadata = {}
     else:
-        metadata = json.loads(metadata_path.read_text())
+        metadata = _loads(metadata_path.read_bytes())
 
     # Copy input_data.tsv and ground_truth.tsv
     for filename in ["input_data.tsv", "ground_truth.tsv"]:
         src = dataset_dir / filename
         dst = task_dir / filename
         if src.exists():
-            shutil.copy2(src, dst)
+            shutil.copyfile(src, dst)
             print(f"  Copied {filename}")
         else:
             print(f"  WARNING: {filename} not found in {dataset_dir}")
@@ -425,29 +618,27 @@ def create_task(dataset_dir: Path, task_name: str):
         local_schema_path = dataset_dir / "schema.json"
         if local_schema_path.exists():
             print(f"  Found local schema.json, copying...")
-            shutil.copy2(local_schema_path, task_dir / "schema.json")
-            schema = json.loads(local_schema_path.read_text())
+            shutil.copyfile(local_schema_path, task_dir / "schema.json")
+            schema = _loads(local_schema_path.read_bytes())
         else:
             print(f"  Fetching schema from {schema_uri}...")
             schema = fetch_schema(schema_uri)
             # Save to task directory
-            (task_dir / "schema.json").write_text(json.dumps(schema, indent=2))
+            (task_dir / "schema.json").write_bytes(_dumps_indented(schema))
             print(f"  Saved schema.json")
 
-    # Generate score.py
-    score_content = generate_score_py(schema)
-    (task_dir / "score.py").write_text(score_content)
+    # Write score.py (identical for every task, encoded once)
+    (task_dir / "score.py").write_bytes(SCORE_PY_BYTES)
     print(f"  Generated score.py")
 
-    # Generate format_prompt.py
-    format_prompt_content = generate_format_prompt_py()
-    (task_dir / "format_prompt.py").write_text(format_prompt_content)
+    # Write format_prompt.py (identical for every task, encoded once)
+    (task_dir / "format_prompt.py").write_bytes(FORMAT_PROMPT_PY_BYTES)
     print(f"  Generated format_prompt.py")
 
     # Generate default_prompt.txt
     schema_type = task_name.replace("htan_", "")
     prompt_content = generate_default_prompt_txt(schema_type, metadata)
-    (task_dir / "default_prompt.txt").write_text(prompt_content)
+    (task_dir / "default_prompt.txt").write_bytes(prompt_content.encode("utf-8"))
     print(f"  Generated default_prompt.txt")
 
     print(f"  ✓ Task {task_name} created successfully")
@@ -471,17 +662,23 @@ def main():
     for d in dataset_dirs:
         print(f"  - {d.name}")
 
-    # Create tasks
+    # Create tasks. Each task is independent and I/O-bound (schema downloads,
+    # file copies), so they are built on a thread pool; progress lines from
+    # different tasks may interleave, errors are reported in order afterwards.
     print("\nCreating tasks...")
-    for dataset_dir in dataset_dirs:
-        schema_type = dataset_dir.name
-        task_name = f"htan_{schema_type}"
-        try:
-            create_task(dataset_dir, task_name)
-        except Exception as e:
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(dataset_dirs)))) as executor:
+        for dataset_dir in dataset_dirs:
+            schema_type = dataset_dir.name
+            task_name = f"htan_{schema_type}"
+            futures[task_name] = executor.submit(create_task, dataset_dir, task_name)
+
+    for task_name, future in futures.items():
+        e = future.exception()
+        if e is not None:
             print(f"  ERROR creating task {task_name}: {e}")
             import traceback
-            traceback.print_exc()
+            traceback.print_exception(type(e), e, e.__traceback__)
 
     print("\n" + "=" * 70)
     print("Task preparation complete!")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Script to update GitHub Pages with latest results."""
+import os
 import shutil
 import subprocess
 import sys
@@ -17,16 +18,29 @@ def main():
     # Copy results files to docs/results
     print("Copying results to docs/results...")
     
+    # One directory pass for both suffixes. Files whose copy already has the
+    # same size and mtime are skipped; copy2 (not copyfile) is kept because
+    # generate_report.py picks the latest experiment by file mtime.
     copied = 0
-    for file in results_dir.glob("*.json"):
-        shutil.copy2(file, docs_results_dir)
-        copied += 1
+    unchanged = 0
+    if results_dir.is_dir():
+        with os.scandir(results_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.name.endswith((".json", ".jsonl")):
+                    continue
+                src_stat = entry.stat()
+                try:
+                    dst_stat = (docs_results_dir / entry.name).stat()
+                except FileNotFoundError:
+                    dst_stat = None
+                if (dst_stat is not None and dst_stat.st_size == src_stat.st_size
+                        and dst_stat.st_mtime_ns == src_stat.st_mtime_ns):
+                    unchanged += 1
+                    continue
+                shutil.copy2(entry.path, docs_results_dir)
+                copied += 1
     
-    for file in results_dir.glob("*.jsonl"):
-        shutil.copy2(file, docs_results_dir)
-        copied += 1
-    
-    print(f"Copied {copied} files to: {docs_results_dir}")
+    print(f"Copied {copied} files to: {docs_results_dir} ({unchanged} unchanged)")
     
     # Generate minified dashboard data file
     print("\nGenerating minified dashboard data...")
@@ -1,43 +1,667 @@
 """AWS Bedrock client for running LLM inference."""
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import tempfile
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
 import boto3
-import requests
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, AsyncIterator, Iterator, Optional, List, Literal
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 from .config import Config
 from .tool import Tool
 from .tool_executor import ToolExecutor
+from .utils import backoff_seconds
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Anthropic Messages API version string expected by Bedrock
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+# System prompts and tool definitions at least this long (~1024 tokens, Claude's
+# minimum cacheable prefix) are marked for Bedrock prompt caching
+PROMPT_CACHE_MIN_CHARS = 4096
+
+# Model ID fragments of Claude models that support Bedrock prompt caching; older
+# ones (e.g. Claude 3 Haiku, Claude 3.5 Sonnet) reject cache_control
+PROMPT_CACHE_MODELS = ('claude-3-7-sonnet', 'claude-3-5-haiku', 'claude-sonnet-4', 'claude-opus-4', 'claude-haiku-4')
+
+
+def _dumps(obj: Any):
+    """Serialize a request body (bytes with orjson, str otherwise; boto3 takes either)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
+
+def _loads(data):
+    """Parse a JSON response body."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=16)
+def _thinking_block(max_tokens: int) -> Dict[str, Any]:
+    """
+    Anthropic thinking config for a max_tokens setting, built once per value.
+
+    The dict is shared between calls; it only ever gets serialized, never modified.
+    """
+    # Set a reasonable thinking budget (minimum is 1024, we'll use 4096 as a default)
+    # The budget should be less than max_tokens
+    thinking_budget = min(4096, max_tokens - 100)  # Leave some room for text output
+    if thinking_budget < 1024:
+        thinking_budget = 1024  # Minimum required
+    return {
+        "type": "enabled",
+        "budget_tokens": thinking_budget
+    }
+
+
+def _anthropic_body(
+    messages: List[Dict[str, Any]],
+    system_instructions: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    thinking: bool,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    prompt_cache: bool = True
+) -> Dict[str, Any]:
+    """Build an Anthropic Messages API request body (shared by plain and tool calls)."""
+    body = {
+        "anthropic_version": ANTHROPIC_VERSION,
+        "max_tokens": max_tokens,
+        "messages": messages
+    }
+    if tools is not None:
+        if prompt_cache and tools and len(_dumps(tools)) >= PROMPT_CACHE_MIN_CHARS:
+            # A breakpoint after the last tool keeps the tool definitions cached
+            # across tool-loop round trips, even when the system prompt is short
+            tools = tools[:-1] + [{**tools[-1], "cache_control": {"type": "ephemeral"}}]
+        body["tools"] = tools
+    if system_instructions:
+        if prompt_cache and len(system_instructions) >= PROMPT_CACHE_MIN_CHARS:
+            # Block form with cache_control lets Bedrock reuse the processed
+            # system prompt across calls instead of re-reading it every time
+            body["system"] = [{
+                "type": "text",
+                "text": system_instructions,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        else:
+            body["system"] = system_instructions
+
+    # Add thinking mode if enabled (per AWS docs: https://docs.aws.amazon.com/bedrock/latest/userguide/claude-messages-extended-thinking.html)
+    # Thinking mode requires a thinking object with type: "enabled" and budget_tokens
+    # Note: temperature is not compatible with thinking mode, so we omit it when thinking is enabled
+    if thinking:
+        body["thinking"] = _thinking_block(max_tokens)
+    else:
+        # Only set temperature when thinking is NOT enabled (they're incompatible)
+        body["temperature"] = temperature
+    return body
+
+
+@lru_cache(maxsize=64)
+def _supports_prompt_cache(model_id: str) -> bool:
+    """Whether Bedrock accepts prompt-caching markers for a model ID."""
+    return any(name in model_id for name in PROMPT_CACHE_MODELS)
+
+
+# Model ID fragments of models that offer latency-optimized inference
+LATENCY_OPTIMIZED_MODELS = ('claude-3-5-haiku', 'nova-pro', 'llama3-1-70b', 'llama3-1-405b')
+
+
+@lru_cache(maxsize=64)
+def _supports_latency_optimized(model_id: str) -> bool:
+    """Whether Bedrock offers latency-optimized inference for a model ID."""
+    return any(name in model_id for name in LATENCY_OPTIMIZED_MODELS)
+
+
+# Bedrock error codes for transient failures worth retrying
+RETRYABLE_ERROR_CODES = frozenset({
+    'ThrottlingException',
+    'ServiceUnavailableException',
+    'ModelTimeoutException',
+    'ModelStreamErrorException'
+})
+
+
+def _openai_body(
+    prompt: str,
+    system_instructions: Optional[str],
+    temperature: float,
+    thinking: bool,
+    max_tokens: int,
+    prompt_cache: bool
+) -> Dict[str, Any]:
+    """OpenAI format request body (system instructions as the first message)."""
+    messages = [{"role": "user", "content": prompt}]
+    if system_instructions:
+        messages.insert(0, {"role": "system", "content": system_instructions})
+    return {
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+
+
+def _nova_body(
+    prompt: str,
+    system_instructions: Optional[str],
+    temperature: float,
+    thinking: bool,
+    max_tokens: int,
+    prompt_cache: bool
+) -> Dict[str, Any]:
+    """Amazon Nova converse API body; system instructions go in the user message (Nova doesn't support system role)."""
+    full_prompt = f"{system_instructions}\n\n{prompt}" if system_instructions else prompt
+    return {
+        "messages": [{"role": "user", "content": [{"text": full_prompt}]}],
+        "inferenceConfig": {"maxTokens": max_tokens, "temperature": temperature}
+    }
+
+
+def _converse_body(
+    prompt: str,
+    system_instructions: Optional[str],
+    temperature: float,
+    thinking: bool,
+    max_tokens: int,
+    prompt_cache: bool
+) -> Dict[str, Any]:
+    """Converse API body for DeepSeek and Meta Llama models, which support the system parameter."""
+    body = {
+        "messages": [{"role": "user", "content": [{"text": prompt}]}],
+        "inferenceConfig": {"maxTokens": max_tokens, "temperature": temperature}
+    }
+    if system_instructions:
+        body["system"] = [{"text": system_instructions}]
+    return body
+
+
+def _anthropic_prompt_body(
+    prompt: str,
+    system_instructions: Optional[str],
+    temperature: float,
+    thinking: bool,
+    max_tokens: int,
+    prompt_cache: bool
+) -> Dict[str, Any]:
+    """Anthropic Messages API body for a single user prompt."""
+    return _anthropic_body(
+        [{"role": "user", "content": prompt}],
+        system_instructions, max_tokens, temperature, thinking,
+        prompt_cache=prompt_cache
+    )
+
+
+# Model families by provider (the model ID segment before the first dot, after
+# any cross-region inference profile prefix): (name, body builder, API).
+# Unrecognised providers are sent the Anthropic format with invoke_model.
+_MODEL_FAMILIES = {
+    'anthropic': ("Anthropic", _anthropic_prompt_body, 'invoke'),
+    'openai': ("OpenAI", _openai_body, 'invoke'),
+    'amazon': ("Nova", _nova_body, 'converse'),
+    'deepseek': ("DeepSeek", _converse_body, 'converse'),
+    'meta': ("Meta", _converse_body, 'converse'),
+}
+_OTHER_FAMILY = ("Other", _anthropic_prompt_body, 'invoke')
+
+# Geographic prefixes of cross-region inference profile IDs (e.g. us.amazon.nova-pro-v1:0)
+_INFERENCE_PROFILE_PREFIXES = frozenset({'us', 'eu', 'apac', 'global', 'us-gov', 'ca', 'jp', 'au'})
+
+
+@lru_cache(maxsize=64)
+def _model_family(model_id: str):
+    """Return (family name, body builder, API kind) for a model ID, resolving each ID once."""
+    provider, _, rest = model_id.partition('.')
+    if provider in _INFERENCE_PROFILE_PREFIXES:
+        provider = rest.partition('.')[0]
+    return _MODEL_FAMILIES.get(provider, _OTHER_FAMILY)
+
+
+def _classify_error(e: ClientError) -> Literal["retry", "terminal", "try_converse"]:
+    """
+    Decide how to handle a failed Bedrock call.
+
+    'retry' for transient failures (throttling, unavailable, timeouts),
+    'try_converse' when the model only accepts the converse API, and
+    'terminal' for everything else.
+    """
+    error = e.response.get('Error', {})
+    error_code = error.get('Code', '')
+    if error_code in RETRYABLE_ERROR_CODES:
+        return "retry"
+    if error_code == 'ValidationException' and 'on-demand throughput' in error.get('Message', ''):
+        return "try_converse"
+    return "terminal"
+
+
+def _retry_after(e: ClientError) -> Optional[str]:
+    """Retry-After header of a failed Bedrock call, if any (botocore lowercases header names)."""
+    return e.response.get('ResponseMetadata', {}).get('HTTPHeaders', {}).get('retry-after')
+
+
+def _text_from_content_blocks(content_list) -> str:
+    """Extract text from a content block array, skipping thinking blocks."""
+    if not content_list or not isinstance(content_list, list):
+        return ''
+    text_parts = []
+    append = text_parts.append
+    for item in content_list:
+        if isinstance(item, dict):
+            # Handle standard text type blocks
+            if item.get('type') == 'text' and 'text' in item:
+                append(item['text'])
+            # Handle DeepSeek R1 reasoningContent format
+            elif 'reasoningContent' in item:
+                reasoning_content = item.get('reasoningContent', {})
+                if 'reasoningText' in reasoning_content:
+                    reasoning_text = reasoning_content.get('reasoningText', {})
+                    if isinstance(reasoning_text, dict) and 'text' in reasoning_text:
+                        append(reasoning_text['text'])
+                    elif isinstance(reasoning_text, str):
+                        append(reasoning_text)
+            # Handle DeepSeek R1 textContent format (if present)
+            elif 'textContent' in item:
+                text_content = item.get('textContent', {})
+                if isinstance(text_content, dict) and 'text' in text_content:
+                    append(text_content['text'])
+                elif isinstance(text_content, str):
+                    append(text_content)
+            # Fallback: if item has 'text' key directly
+            elif 'text' in item and not item.get('type') == 'thinking':
+                append(item['text'])
+    return ''.join(text_parts)
+
+
+def _fallback_text(response_body: Dict[str, Any]):
+    """Last resort when the expected fields are empty: a direct text (or output) field."""
+    return response_body.get('text', response_body.get('output', ''))
+
+
+def _extract_converse(response_body: Dict[str, Any]):
+    """Extract text from a Converse API response (output.message.content array)."""
+    message = response_body.get('output', {}).get('message', {})
+    return _text_from_content_blocks(message.get('content')) or _fallback_text(response_body)
+
+
+def _extract_anthropic(response_body: Dict[str, Any]):
+    """Extract text from an Anthropic invoke_model response (content array with text and thinking blocks)."""
+    return _text_from_content_blocks(response_body.get('content')) or _fallback_text(response_body)
+
+
+def _extract_openai(response_body: Dict[str, Any]):
+    """Extract text from an OpenAI invoke_model response (choices array)."""
+    content = ''
+    choices = response_body.get('choices')
+    if choices and isinstance(choices, list):
+        choice = choices[0]
+        if 'message' in choice:
+            content = choice['message'].get('content', '')
+        elif 'text' in choice:
+            content = choice.get('text', '')
+    return content or _fallback_text(response_body)
+
+
+def _extract_any(response_body: Dict[str, Any]):
+    """Extract text from a response of unknown format, trying each known format in turn."""
+    message = response_body.get('output', {})
+    message = message.get('message', {}) if isinstance(message, dict) else {}
+    return (
+        _text_from_content_blocks(message.get('content'))
+        or _text_from_content_blocks(response_body.get('content'))
+        or _extract_openai(response_body)
+    )
+
+
+# invoke_model response parser by family name; unrecognised providers get the cascade
+_INVOKE_EXTRACTORS = {"OpenAI": _extract_openai, "Anthropic": _extract_anthropic}
+
+
+def _openai_tool_calls(response_body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tool calls from an OpenAI response (function_call in choices)."""
+    tool_calls = []
+    for choice in response_body.get('choices', []):
+        message = choice.get('message', {})
+        if 'function_call' in message:
+            func_call = message['function_call']
+            # Parse arguments if it's a string
+            arguments = func_call.get('arguments', '{}')
+            if isinstance(arguments, str):
+                try:
+                    arguments = _loads(arguments)
+                except:
+                    arguments = {}
+            tool_calls.append({
+                'toolUseId': func_call.get('id') or f"call_{len(tool_calls)}",
+                'name': func_call.get('name'),
+                'input': arguments
+            })
+    return tool_calls
+
+
+def _converse_tool_calls(response_body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tool calls from a Converse API response (toolUse blocks in output.message.content)."""
+    content = response_body.get('output', {}).get('message', {}).get('content', [])
+    return [item['toolUse'] for item in content if isinstance(item, dict) and item.get('toolUse')]
+
+
+def _anthropic_tool_calls(response_body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tool calls from an Anthropic response (tool_use blocks in the content array)."""
+    return [
+        {
+            'toolUseId': item.get('id'),
+            'name': item.get('name'),
+            'input': item.get('input', {})
+        }
+        for item in response_body.get('content', [])
+        if isinstance(item, dict) and item.get('type') == 'tool_use'
+    ]
+
+
+def _invoke_stream_text(event_stream) -> Iterator[str]:
+    """Yield generated text from an invoke_model_with_response_stream body (Anthropic or OpenAI chunks)."""
+    for event in event_stream:
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        data = _loads(chunk['bytes'])
+        if data.get('type') == 'content_block_delta':
+            # Anthropic: skip thinking deltas, like the non-streaming extractor
+            delta = data.get('delta', {})
+            if delta.get('type') == 'text_delta':
+                yield delta.get('text', '')
+        elif data.get('choices'):
+            # OpenAI
+            text = (data['choices'][0].get('delta') or {}).get('content')
+            if text:
+                yield text
+
+
+def _converse_stream_text(event_stream) -> Iterator[str]:
+    """Yield generated text from a converse_stream event stream."""
+    for event in event_stream:
+        delta = event.get('contentBlockDelta', {}).get('delta', {})
+        if 'text' in delta:
+            yield delta['text']
+        elif 'reasoningContent' in delta:
+            # DeepSeek R1 reasoning text, as in the non-streaming extractor
+            text = delta['reasoningContent'].get('text')
+            if text:
+                yield text
+
+
+def _split_s3_uri(uri: str):
+    """Split an s3://bucket/key URI into (bucket, key)."""
+    if not uri.startswith('s3://'):
+        raise ValueError(f"Expected an s3:// URI, got {uri!r}")
+    bucket, _, key = uri[len('s3://'):].partition('/')
+    return bucket, key
+
+
+def _cache_key(
+    model_id: str,
+    prompt: str,
+    system_instructions: Optional[str],
+    temperature: float,
+    thinking: bool,
+    max_tokens: int
+) -> str:
+    """Response cache key: sha256 of the normalized request parameters."""
+    request = {
+        "m": model_id,
+        "p": prompt,
+        "s": system_instructions,
+        "t": temperature,
+        "th": thinking,
+        "mx": max_tokens
+    }
+    # Keys are always in the same order, so no sorting is needed
+    data = _dumps(request)
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+_bearer_token_lock = threading.Lock()
+
+
+def _export_bearer_token(token: str) -> None:
+    """
+    Expose a Bedrock bearer token to boto3, which only reads it from the environment.
+
+    Set once per process: an existing value is left alone (Config already prefers
+    it over the creds file), so constructing clients doesn't keep rewriting
+    process-global state.
+    """
+    if 'AWS_BEARER_TOKEN_BEDROCK' in os.environ:
+        return
+    with _bearer_token_lock:
+        os.environ.setdefault('AWS_BEARER_TOKEN_BEDROCK', token)
+
+
+# Model IDs known to need the converse API, kept across runs
+API_KIND_CACHE_PATH = Path(__file__).parent.parent / ".bedrock_api_cache.json"
+_api_kind_cache_lock = threading.Lock()
+
+
+def _load_api_kinds() -> Dict[str, str]:
+    """Load the persisted model ID -> API kind hints (empty if missing or unreadable)."""
+    try:
+        kinds = _loads(API_KIND_CACHE_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    return kinds if isinstance(kinds, dict) else {}
+
+
+def _save_api_kinds(kinds: Dict[str, str]) -> None:
+    """Persist the API kind hints; they're only an optimization, so failures are ignored."""
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=API_KIND_CACHE_PATH.parent, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(kinds, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, API_KIND_CACHE_PATH)
+    except OSError:
+        pass
+
+
+# Shared bedrock-runtime clients, keyed by (region, pool size, credentials fingerprint)
+_runtime_clients: Dict[tuple, Any] = {}
+_runtime_clients_lock = threading.Lock()
+
+
+def _get_bedrock_runtime(
+    region: str,
+    max_pool_connections: int,
+    read_timeout: float,
+    bearer_token: Optional[str],
+    aws_key: Optional[str],
+    aws_secret: Optional[str]
+):
+    """
+    Return the shared bedrock-runtime client for these settings, creating it on first use.
+
+    Building a boto3 client resolves endpoints and credentials and opens its own
+    connection pool, so every BedrockClient with the same settings reuses one.
+    Low-level boto3 clients are thread-safe, so the executor threads behind
+    invoke_many can all share it.
+    """
+    # Hash the credentials so they never appear in the cache key
+    fingerprint = hashlib.sha1(
+        "\0".join((bearer_token or "", aws_key or "", aws_secret or "")).encode()
+    ).hexdigest()
+    key = (region, max_pool_connections, read_timeout, fingerprint)
+    with _runtime_clients_lock:
+        client = _runtime_clients.get(key)
+        if client is None:
+            # boto3 keeps a persistent connection pool per client; TCP keepalive stops
+            # idle pooled connections from being dropped between (slow) generations,
+            # so warm calls skip a fresh TCP + TLS handshake. The pool is sized to the
+            # async fan-out (botocore's default is 10). Adaptive mode adds botocore's
+            # client-side rate limiter, which slows every thread sharing the client
+            # once Bedrock starts throttling; its retries stay off (one attempt)
+            # because invoke_model already retries with backoff. The read timeout
+            # follows experiment.timeout_seconds, since long or thinking
+            # generations can take longer than botocore's 60 second default.
+            client_kwargs = {
+                'region_name': region,
+                'config': BotoConfig(
+                    max_pool_connections=max_pool_connections,
+                    retries={'total_max_attempts': 1, 'mode': 'adaptive'},
+                    read_timeout=read_timeout,
+                    tcp_keepalive=True
+                )
+            }
+            if aws_key and aws_secret:
+                client_kwargs['aws_access_key_id'] = aws_key
+                client_kwargs['aws_secret_access_key'] = aws_secret
+            client = boto3.client('bedrock-runtime', **client_kwargs)
+            _runtime_clients[key] = client
+    return client
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of successful invoke_model results.
+
+    Any object with the same get/set interface (e.g. one backed by Redis or
+    SQLite) can be passed to BedrockClient instead.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 1800.0):
+        """
+        Args:
+            maxsize: Maximum number of cached responses
+            ttl: Seconds a cached response stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (result, created_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result for key, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            result, created_at = entry
+            if time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(result)
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Cache result under key, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (dict(result), time.time())
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
 
 
 class BedrockClient:
     """Client for interacting with AWS Bedrock."""
     
-    def __init__(self, config: Config):
-        """Initialize Bedrock client with configuration."""
+    def __init__(self, config: Config, cache: Optional[ResponseCache] = None):
+        """
+        Initialize Bedrock client with configuration.
+
+        Args:
+            config: Framework configuration
+            cache: Response cache for deterministic (temperature 0, no thinking)
+                   calls; defaults to an in-process ResponseCache
+        """
         self.config = config
+        self.cache = cache if cache is not None else ResponseCache()
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.bearer_token = config.get_bearer_token()
         
         # Set bearer token as environment variable so boto3 can use it
         if self.bearer_token:
-            import os
-            os.environ['AWS_BEARER_TOKEN_BEDROCK'] = self.bearer_token
+            _export_bearer_token(self.bearer_token)
         
         # Always use boto3 - it will automatically use the bearer token from environment
-        # if available, otherwise fall back to AWS credentials
-        client_kwargs = {'region_name': config.aws_region}
-        
+        # if available, otherwise fall back to AWS credentials.
         # Only set AWS credentials if bearer token is not available
+        aws_key = aws_secret = None
         if not self.bearer_token:
-            aws_key = config.get_aws_access_key()
-            aws_secret = config.get_aws_secret_key()
-            
-            if aws_key and aws_secret:
-                client_kwargs['aws_access_key_id'] = aws_key
-                client_kwargs['aws_secret_access_key'] = aws_secret
+            aws_key = config.get_aws_access_key() or None
+            aws_secret = config.get_aws_secret_key() or None
+            if not (aws_key and aws_secret):
+                aws_key = aws_secret = None
         
-        self.bedrock_runtime = boto3.client('bedrock-runtime', **client_kwargs)
+        self.bedrock_runtime = _get_bedrock_runtime(
+            config.aws_region, config.max_concurrency, config.timeout_seconds,
+            self.bearer_token, aws_key, aws_secret
+        )
+        self._aws_key = aws_key
+        self._aws_secret = aws_secret
+        self._batch_clients: Dict[str, Any] = {}
         self.use_bearer_token = False  # We use boto3, which handles bearer token via env var
+
+        # Identical deterministic requests currently being sent, by cache key
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Base model IDs to route through cross-region inference profiles
+        self.inference_profiles = config.inference_profiles
+
+        # Mark long system prompts for Bedrock prompt caching
+        self.enable_prompt_cache = config.enable_prompt_cache
+
+        # Converted tool definitions, by (tools, model family)
+        self._tool_formats: Dict[tuple, List[Dict[str, Any]]] = {}
+
+        # Request latency-optimized inference for models that offer it
+        self.latency_optimized = config.latency_optimized
+
+        # Model IDs found to need the converse API rather than invoke_model
+        # (also remembered on disk, so later runs skip the failing probe)
+        self._api_for_model: Dict[str, str] = _load_api_kinds()
+
+        # Worker threads for the async API (threads are started on demand)
+        self.max_concurrency = config.max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='bedrock')
+    
+    def close(self) -> None:
+        """Stop the async API's worker threads (calls already running are left to finish)."""
+        self._executor.shutdown(wait=False)
+    
+    def __enter__(self) -> "BedrockClient":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _prompt_cache(self, model_id: str) -> bool:
+        """Whether to mark long prompt prefixes for Bedrock prompt caching on this model."""
+        return self.enable_prompt_cache and _supports_prompt_cache(model_id)
+    
+    def _latency_kwargs(self, model_id: str, api: str) -> Dict[str, Any]:
+        """Extra invoke_model/converse arguments requesting latency-optimized inference, if enabled and offered."""
+        if not (self.latency_optimized and _supports_latency_optimized(model_id)):
+            return {}
+        if api == 'converse':
+            return {'performanceConfig': {'latency': 'optimized'}}
+        return {'performanceConfigLatency': 'optimized'}
     
     def _convert_tools_to_bedrock_format(self, tools: List[Tool], model_id: str) -> List[Dict[str, Any]]:
         """
@@ -48,16 +672,22 @@ class BedrockClient:
             model_id: Model ID to determine format (Anthropic vs Converse API vs OpenAI)
             
         Returns:
-            List of tool definitions in appropriate format
+            List of tool definitions in appropriate format (cached and shared
+            between calls, so callers must not modify it)
         """
-        is_openai = model_id.startswith('openai.')
-        use_converse_api = (
-            model_id.startswith('us.amazon.') or model_id.startswith('amazon.') or
-            model_id.startswith('us.deepseek.') or model_id.startswith('deepseek.') or
-            model_id.startswith('us.meta.') or model_id.startswith('meta.')
-        )
+        model_type, _, api = _model_family(model_id)
         
-        if is_openai:
+        # Tool sets are reused across tasks and tool-loop calls; convert each once per family
+        key = (tuple(tools), model_type)
+        converted = self._tool_formats.get(key)
+        if converted is None:
+            converted = self._tool_formats[key] = self._format_tools(tools, model_type, api)
+        return converted
+    
+    @staticmethod
+    def _format_tools(tools: List[Tool], model_type: str, api: str) -> List[Dict[str, Any]]:
+        """Build the tool definitions for a model family (see _convert_tools_to_bedrock_format)."""
+        if model_type == "OpenAI":
             # OpenAI format - uses "functions" instead of "tools"
             result = []
             for tool in tools:
@@ -69,7 +699,7 @@ class BedrockClient:
                     "parameters": schema  # OpenAI uses "parameters" instead of "input_schema"
                 })
             return result
-        elif use_converse_api:
+        elif api == 'converse':
             # Converse API format
             return [tool.to_bedrock_format() for tool in tools]
         else:
@@ -86,50 +716,15 @@ class BedrockClient:
     
     def _extract_tool_calls_from_response(self, response_body: Dict[str, Any], model_id: str = None) -> List[Dict[str, Any]]:
         """Extract tool calls from a Bedrock response."""
-        tool_calls = []
-        is_openai = model_id and model_id.startswith('openai.')
-        
-        if is_openai:
-            # OpenAI format - check for function_call in choices
-            if 'choices' in response_body:
-                for choice in response_body.get('choices', []):
-                    message = choice.get('message', {})
-                    if 'function_call' in message:
-                        func_call = message['function_call']
-                        # Parse arguments if it's a string
-                        arguments = func_call.get('arguments', '{}')
-                        if isinstance(arguments, str):
-                            try:
-                                arguments = json.loads(arguments)
-                            except:
-                                arguments = {}
-                        tool_calls.append({
-                            'toolUseId': func_call.get('id') or f"call_{len(tool_calls)}",
-                            'name': func_call.get('name'),
-                            'input': arguments
-                        })
-        else:
-            # Check Converse API format (output.message.content)
-            if 'output' in response_body:
-                output = response_body.get('output', {})
-                if 'message' in output:
-                    message = output.get('message', {})
-                    content = message.get('content', [])
-                    for item in content:
-                        if isinstance(item, dict) and item.get('toolUse'):
-                            tool_calls.append(item['toolUse'])
-            
-            # Check Anthropic format (content array)
-            if 'content' in response_body:
-                for item in response_body.get('content', []):
-                    if isinstance(item, dict) and item.get('type') == 'tool_use':
-                        tool_calls.append({
-                            'toolUseId': item.get('id'),
-                            'name': item.get('name'),
-                            'input': item.get('input', {})
-                        })
-        
-        return tool_calls
+        if model_id is None:
+            # Unknown family: accept either Converse or Anthropic format
+            return _converse_tool_calls(response_body) + _anthropic_tool_calls(response_body)
+        model_type, _, api = _model_family(model_id)
+        if model_type == "OpenAI":
+            return _openai_tool_calls(response_body)
+        if api == 'converse':
+            return _converse_tool_calls(response_body)
+        return _anthropic_tool_calls(response_body)
     
     def _invoke_model_with_tools(
         self,
@@ -141,7 +736,8 @@ class BedrockClient:
         max_tokens: int,
         max_retries: int,
         tools: List[Tool],
-        tool_executor: ToolExecutor
+        tool_executor: ToolExecutor,
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Invoke model with tools, handling tool use flow.
@@ -156,12 +752,10 @@ class BedrockClient:
         messages = []
         
         # Determine model type and format
-        is_openai = model_id.startswith('openai.')
-        use_converse_api = (
-            model_id.startswith('us.amazon.') or model_id.startswith('amazon.') or
-            model_id.startswith('us.deepseek.') or model_id.startswith('deepseek.') or
-            model_id.startswith('us.meta.') or model_id.startswith('meta.')
-        )
+        model_type, _, api = _model_family(model_id)
+        is_openai = model_type == "OpenAI"
+        use_converse_api = api == 'converse'
+        extract = _extract_converse if use_converse_api else _INVOKE_EXTRACTORS.get(model_type, _extract_any)
         
         if is_openai:
             # OpenAI format - build messages with system instruction
@@ -208,9 +802,10 @@ class BedrockClient:
                         
                         response = self.bedrock_runtime.invoke_model(
                             modelId=model_id,
-                            body=json.dumps(body)
+                            body=_dumps(body),
+                            **self._latency_kwargs(model_id, 'invoke')
                         )
-                        response_body = json.loads(response['body'].read())
+                        response_body = _loads(response['body'].read())
                     elif use_converse_api:
                         converse_kwargs = {
                             'modelId': model_id,
@@ -225,35 +820,23 @@ class BedrockClient:
                         }
                         if system_instructions:
                             converse_kwargs['system'] = [{"text": system_instructions}]
+                        converse_kwargs.update(self._latency_kwargs(model_id, 'converse'))
                         
                         response = self.bedrock_runtime.converse(**converse_kwargs)
                         response_body = response
                     else:
                         # Anthropic format
-                        body = {
-                            "anthropic_version": "bedrock-2023-05-31",
-                            "max_tokens": max_tokens,
-                            "messages": messages,
-                            "tools": bedrock_tools
-                        }
-                        if system_instructions:
-                            body["system"] = system_instructions
-                        if thinking:
-                            thinking_budget = min(4096, max_tokens - 100)
-                            if thinking_budget < 1024:
-                                thinking_budget = 1024
-                            body["thinking"] = {
-                                "type": "enabled",
-                                "budget_tokens": thinking_budget
-                            }
-                        else:
-                            body["temperature"] = temperature
+                        body = _anthropic_body(
+                            messages, system_instructions, max_tokens, temperature, thinking,
+                            tools=bedrock_tools, prompt_cache=self._prompt_cache(model_id)
+                        )
                         
                         response = self.bedrock_runtime.invoke_model(
                             modelId=model_id,
-                            body=json.dumps(body)
+                            body=_dumps(body),
+                            **self._latency_kwargs(model_id, 'invoke')
                         )
-                        response_body = json.loads(response['body'].read())
+                        response_body = _loads(response['body'].read())
                     
                     # Check for tool calls
                     tool_calls = self._extract_tool_calls_from_response(response_body, model_id)
@@ -281,22 +864,20 @@ class BedrockClient:
                         messages.append(assistant_message)
                         
                         # Add tool results as function message
+                        tool_names = {}
+                        for tool_call in tool_calls:
+                            # First call wins if the model reused an ID
+                            tool_names.setdefault(tool_call.get('toolUseId'), tool_call.get('name'))
                         for result in tool_results:
-                            tool_use_id = result.get('toolUseId')
-                            tool_name = None
                             # Find the tool name from the tool call
-                            for tool_call in tool_calls:
-                                if tool_call.get('toolUseId') == tool_use_id:
-                                    tool_name = tool_call.get('name')
-                                    break
+                            tool_name = tool_names.get(result.get('toolUseId'))
                             
                             # Extract result content
-                            result_content = ""
-                            for content_item in result.get('content', []):
-                                if isinstance(content_item, dict):
-                                    result_content += content_item.get('text', '')
-                                elif isinstance(content_item, str):
-                                    result_content += content_item
+                            result_content = "".join(
+                                content_item.get('text', '') if isinstance(content_item, dict) else content_item
+                                for content_item in result.get('content', [])
+                                if isinstance(content_item, (dict, str))
+                            )
                             
                             messages.append({
                                 "role": "function",
@@ -369,57 +950,31 @@ class BedrockClient:
                     
                     tool_iterations += 1
                 
-                # Extract final content
-                content = ''
-                if is_openai:
-                    # OpenAI format
-                    if 'choices' in response_body and len(response_body['choices']) > 0:
-                        choice = response_body['choices'][0]
-                        message = choice.get('message', {})
-                        # Check if there's content (not a function call)
-                        if 'content' in message and message['content']:
-                            content = message['content']
-                        elif 'function_call' not in message:
-                            # No function call and no content - might be empty
-                            content = message.get('content', '')
-                elif use_converse_api:
-                    if 'output' in response_body:
-                        output = response_body.get('output', {})
-                        if 'message' in output:
-                            message = output.get('message', {})
-                            content_list = message.get('content', [])
-                            for item in content_list:
-                                if isinstance(item, dict) and item.get('text'):
-                                    content += item['text']
-                else:
-                    # Anthropic format
-                    content_list = response_body.get('content', [])
-                    for item in content_list:
-                        if isinstance(item, dict) and item.get('type') == 'text':
-                            content += item.get('text', '')
+                # Extract final content with the family's parser
+                content = extract(response_body)
                 
-                return {
+                result = {
                     'success': True,
                     'content': content,
                     'model_id': model_id,
                     'usage': response_body.get('usage', {}),
                     'attempt': attempt + 1,
-                    'raw_response': response_body,
                     'tool_calls': all_tool_calls,
                     'tool_execution_history': tool_executor.get_execution_history()
                 }
+                if debug:
+                    result['raw_response'] = response_body
+                return result
             
             except ClientError as e:
-                error_code = e.response.get('Error', {}).get('Code', '')
-                if error_code == 'ThrottlingException' and attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
+                if _classify_error(e) == "retry" and attempt < max_retries - 1:
+                    time.sleep(backoff_seconds(attempt, _retry_after(e)))
                     continue
                 else:
                     return {
                         'success': False,
                         'error': str(e),
-                        'error_code': error_code,
+                        'error_code': e.response.get('Error', {}).get('Code', ''),
                         'model_id': model_id,
                         'attempt': attempt + 1,
                         'tool_calls': all_tool_calls
@@ -450,7 +1005,8 @@ class BedrockClient:
         max_tokens: int = 4096,
         max_retries: int = 3,
         tools: Optional[List[Tool]] = None,
-        tool_executor: Optional[ToolExecutor] = None
+        tool_executor: Optional[ToolExecutor] = None,
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Invoke a Bedrock model with the given parameters.
@@ -465,12 +1021,14 @@ class BedrockClient:
             max_retries: Number of retry attempts
             tools: Optional list of Tool objects to make available to the model
             tool_executor: Optional ToolExecutor for handling tool calls (required if tools provided)
+            debug: Include the raw API response in the result as 'raw_response'
             
         Returns:
             Dictionary containing the response and metadata, including tool usage information
         """
         if system_instructions is None:
             system_instructions = self.config.default_system_instructions
+        model_id = self.inference_profiles.get(model_id, model_id)
 
         # If tools are provided, use tool-aware invocation
         if tools and tool_executor:
@@ -483,353 +1041,264 @@ class BedrockClient:
                 max_tokens=max_tokens,
                 max_retries=max_retries,
                 tools=tools,
-                tool_executor=tool_executor
+                tool_executor=tool_executor,
+                debug=debug
             )
         
+        # Identical deterministic requests are answered from the cache. Sampled
+        # output is never reused: temperature > 0, or thinking mode (which drops
+        # the temperature setting); debug calls always go out
+        cache_key = None
+        if temperature == 0.0 and not thinking and not debug:
+            cache_key = _cache_key(model_id, prompt, system_instructions, temperature, thinking, max_tokens)
+            # Checked under the in-flight lock: the thread sending a request caches
+            # its result before releasing the key, so a caller sees one or the other
+            with self._inflight_lock:
+                cached = self.cache.get(cache_key)
+                inflight = None
+                if cached is None:
+                    inflight = self._inflight.get(cache_key)
+                    if inflight is None:
+                        self._inflight[cache_key] = Future()
+                if cached is None and inflight is None:
+                    self.cache_misses += 1
+                else:
+                    self.cache_hits += 1
+            if cached is not None:
+                return cached
+            if inflight is not None:
+                # An identical request is already in flight; share its result
+                return dict(inflight.result())
+        
         # Otherwise, use standard invocation (existing code)
-        # Detect model provider and prepare appropriate request body
-        if model_id.startswith('openai.'):
-            # OpenAI format
-            body = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": max_tokens,
-                "temperature": temperature
-            }
-            if system_instructions:
-                # Add system message as first message
-                body["messages"].insert(0, {
-                    "role": "system",
-                    "content": system_instructions
-                })
-        elif model_id.startswith('us.amazon.') or model_id.startswith('amazon.'):
-            # Amazon Nova format - use converse API format
-            # Include system instructions in the user message (Nova doesn't support system role)
-            full_prompt = prompt
-            if system_instructions:
-                full_prompt = f"{system_instructions}\n\n{prompt}"
-            # Use converse API format for Nova
-            inference_config = {
-                "maxTokens": max_tokens,
-                "temperature": temperature
-            }
-            
-            body = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [{"text": full_prompt}]
-                    }
-                ],
-                "inferenceConfig": inference_config
-            }
-        elif model_id.startswith('us.deepseek.') or model_id.startswith('deepseek.'):
-            # DeepSeek format - use converse API format
-            # DeepSeek models support system instructions via the system parameter in Converse API
-            inference_config = {
-                "maxTokens": max_tokens,
-                "temperature": temperature
-            }
-            
-            body = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [{"text": prompt}]
-                    }
-                ],
-                "inferenceConfig": inference_config
-            }
-            # Add system instructions if provided (DeepSeek supports system role in Converse API)
-            if system_instructions:
-                body["system"] = [{"text": system_instructions}]
-        elif model_id.startswith('us.meta.') or model_id.startswith('meta.'):
-            # Meta Llama format - use converse API format
-            # Meta Llama models support system instructions via the system parameter in Converse API
-            inference_config = {
-                "maxTokens": max_tokens,
-                "temperature": temperature
-            }
+        try:
+            body = _model_family(model_id)[1](
+                prompt, system_instructions, temperature, thinking, max_tokens, self._prompt_cache(model_id)
+            )
             
-            body = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [{"text": prompt}]
-                    }
-                ],
-                "inferenceConfig": inference_config
-            }
-            # Add system instructions if provided (Meta Llama supports system role in Converse API)
-            if system_instructions:
-                body["system"] = [{"text": system_instructions}]
+            result = self._retry(
+                lambda: self._do_one_invoke(body, model_id, thinking, max_tokens, temperature, debug),
+                model_id,
+                max_retries
+            )
+        except BaseException as e:
+            if cache_key is not None:
+                self._release_inflight(cache_key, error=e)
+            raise
+        if cache_key is not None:
+            if result['success']:
+                self.cache.set(cache_key, result)
+            self._release_inflight(cache_key, result=result)
+        return result
+
+    def _release_inflight(
+        self,
+        cache_key: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """Hand the outcome of an in-flight request to any callers waiting on it."""
+        with self._inflight_lock:
+            future = self._inflight.pop(cache_key)
+        if error is not None:
+            future.set_exception(error)
         else:
-            # Anthropic format (default)
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": max_tokens,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            }
-            if system_instructions:
-                body["system"] = system_instructions
-            
-            # Add thinking mode if enabled (per AWS docs: https://docs.aws.amazon.com/bedrock/latest/userguide/claude-messages-extended-thinking.html)
-            # Thinking mode requires a thinking object with type: "enabled" and budget_tokens
-            # Note: temperature is not compatible with thinking mode, so we omit it when thinking is enabled
-            if thinking:
-                # Set a reasonable thinking budget (minimum is 1024, we'll use 4096 as a default)
-                # The budget should be less than max_tokens
-                thinking_budget = min(4096, max_tokens - 100)  # Leave some room for text output
-                if thinking_budget < 1024:
-                    thinking_budget = 1024  # Minimum required
-                
-                body["thinking"] = {
-                    "type": "enabled",
-                    "budget_tokens": thinking_budget
-                }
-            else:
-                # Only set temperature when thinking is NOT enabled (they're incompatible)
-                body["temperature"] = temperature
+            future.set_result(result)
+
+    def _do_one_invoke(
+        self,
+        body: Dict[str, Any],
+        model_id: str,
+        thinking: bool,
+        max_tokens: int,
+        temperature: float,
+        debug: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Make a single invocation attempt for a prepared request body.
+
+        Returns the success result straight away; errors propagate to _retry,
+        which decides whether to try again.
+        """
+        # Always use boto3 - it automatically uses bearer token from AWS_BEARER_TOKEN_BEDROCK env var
+        # if available, otherwise uses AWS credentials
         
-        for attempt in range(max_retries):
+        # For Amazon Nova, DeepSeek, and Meta models, use converse API directly
+        model_type, _, api = _model_family(model_id)
+        if api == 'converse':
             try:
-                # Always use boto3 - it automatically uses bearer token from AWS_BEARER_TOKEN_BEDROCK env var
-                # if available, otherwise uses AWS credentials
-                
-                # For Amazon Nova, DeepSeek, and Meta models, use converse API directly
-                if model_id.startswith('us.amazon.') or model_id.startswith('amazon.') or model_id.startswith('us.deepseek.') or model_id.startswith('deepseek.') or model_id.startswith('us.meta.') or model_id.startswith('meta.'):
-                    try:
-                        # Debug: print the request structure
-                        if model_id.startswith('us.amazon.') or model_id.startswith('amazon.'):
-                            model_type = "Nova"
-                        elif model_id.startswith('us.deepseek.') or model_id.startswith('deepseek.'):
-                            model_type = "DeepSeek"
-                        elif model_id.startswith('us.meta.') or model_id.startswith('meta.'):
-                            model_type = "Meta"
-                        else:
-                            model_type = "Unknown"
-                        print(f"    [DEBUG] Calling {model_type} model: {model_id}")
-                        print(f"    [DEBUG] Messages: {len(body['messages'])} message(s)")
-                        print(f"    [DEBUG] InferenceConfig: {body.get('inferenceConfig', {})}")
-                        if 'system' in body:
-                            print(f"    [DEBUG] System instructions: {len(body['system'])} system message(s)")
-                        
-                        # Build converse API call parameters
-                        converse_kwargs = {
-                            'modelId': model_id,
-                            'messages': body['messages'],
-                            'inferenceConfig': body.get('inferenceConfig', {})
-                        }
-                        # Add system instructions if present (for DeepSeek models)
-                        if 'system' in body:
-                            converse_kwargs['system'] = body['system']
-                        
-                        response = self.bedrock_runtime.converse(**converse_kwargs)
-                        # Converse API returns response directly as a dict
-                        response_body = response
-                        
-                        # Debug: print response structure
-                        print(f"    [DEBUG] Response keys: {list(response_body.keys()) if isinstance(response_body, dict) else 'Not a dict'}")
-                        if isinstance(response_body, dict) and 'output' in response_body:
-                            print(f"    [DEBUG] Output keys: {list(response_body['output'].keys()) if isinstance(response_body.get('output'), dict) else 'Not a dict'}")
-                    except ClientError as e:
-                        error_code = e.response.get('Error', {}).get('Code', '')
-                        error_message = e.response.get('Error', {}).get('Message', '')
-                        # Print detailed error for debugging
-                        print(f"    [ERROR] Nova model invocation failed: {error_code} - {error_message}")
-                        print(f"    [ERROR] Model ID: {model_id}")
-                        print(f"    [ERROR] InferenceConfig: {body.get('inferenceConfig', {})}")
-                        print(f"    [ERROR] Full error response: {e.response}")
-                        raise e
-                    except Exception as e:
-                        # Catch any other exceptions
-                        print(f"    [ERROR] Unexpected error calling Nova model: {type(e).__name__}: {str(e)}")
-                        print(f"    [ERROR] Model ID: {model_id}")
-                        raise e
-                else:
-                    # Use invoke_model for Anthropic models (supports thinking mode via thinking object in body)
-                    try:
-                        response = self.bedrock_runtime.invoke_model(
-                            modelId=model_id,
-                            body=json.dumps(body)
-                        )
-                        response_body = json.loads(response['body'].read())
-                    except ClientError as e:
-                        error_code = e.response.get('Error', {}).get('Code', '')
-                        error_message = e.response.get('Error', {}).get('Message', '')
-                        
-                        # If invoke_model fails with ValidationException about on-demand throughput,
-                        # try using converse API instead (for newer models)
-                        if error_code == 'ValidationException' and 'on-demand throughput' in error_message:
-                            # Convert to converse API format
-                            converse_messages = []
-                            for msg in body.get('messages', []):
-                                converse_messages.append({
-                                    'role': msg.get('role', 'user'),
-                                    'content': [{'text': msg.get('content', '')}]
-                                })
-                            
-                            converse_kwargs = {
-                                'modelId': model_id,
-                                'messages': converse_messages
-                            }
-                            
-                            if body.get('system'):
-                                converse_kwargs['system'] = [{'text': body['system']}]
-                            
-                            inference_config = {
-                                'maxTokens': body.get('max_tokens', max_tokens)
-                            }
-                            
-                            # Note: thinking mode and temperature are incompatible
-                            # If thinking is enabled, don't set temperature
-                            if not thinking:
-                                inference_config['temperature'] = body.get('temperature', temperature)
-                            
-                            converse_kwargs['inferenceConfig'] = inference_config
-                            
-                            # Note: thinking mode may not be supported in converse API fallback
-                            # If thinking was requested, log a warning
-                            if thinking:
-                                print(f"Warning: Thinking mode requested but falling back to converse API which may not support it")
-                            
-                            response = self.bedrock_runtime.converse(**converse_kwargs)
-                            # Converse API returns response directly, not wrapped in 'body'
-                            response_body = response
-                        else:
-                            raise e
+                # Debug: log the request structure
+                logger.debug("Calling %s model: %s", model_type, model_id)
+                logger.debug("Messages: %d message(s)", len(body['messages']))
+                logger.debug("InferenceConfig: %s", body.get('inferenceConfig', {}))
+                if 'system' in body:
+                    logger.debug("System instructions: %d system message(s)", len(body['system']))
                 
-                # Extract content based on model response format
-                content = ''
-                
-                # Helper function to extract text from content array (filters out thinking blocks)
-                def extract_text_from_content_array(content_list):
-                    """Extract text from content array, skipping thinking blocks."""
-                    if not content_list or not isinstance(content_list, list):
-                        return ''
-                    text_parts = []
-                    for item in content_list:
-                        if isinstance(item, dict):
-                            # Handle standard text type blocks
-                            if item.get('type') == 'text' and 'text' in item:
-                                text_parts.append(item['text'])
-                            # Handle DeepSeek R1 reasoningContent format
-                            elif 'reasoningContent' in item:
-                                reasoning_content = item.get('reasoningContent', {})
-                                if 'reasoningText' in reasoning_content:
-                                    reasoning_text = reasoning_content.get('reasoningText', {})
-                                    if isinstance(reasoning_text, dict) and 'text' in reasoning_text:
-                                        text_parts.append(reasoning_text['text'])
-                                    elif isinstance(reasoning_text, str):
-                                        text_parts.append(reasoning_text)
-                            # Handle DeepSeek R1 textContent format (if present)
-                            elif 'textContent' in item:
-                                text_content = item.get('textContent', {})
-                                if isinstance(text_content, dict) and 'text' in text_content:
-                                    text_parts.append(text_content['text'])
-                                elif isinstance(text_content, str):
-                                    text_parts.append(text_content)
-                            # Fallback: if item has 'text' key directly
-                            elif 'text' in item and not item.get('type') == 'thinking':
-                                text_parts.append(item['text'])
-                    return ''.join(text_parts)
-                
-                # Try converse API format first (output.message.content array)
-                if 'output' in response_body:
-                    output = response_body.get('output', {})
-                    if 'message' in output:
-                        message = output['message']
-                        if 'content' in message:
-                            content_list = message.get('content', [])
-                            content = extract_text_from_content_array(content_list)
-                
-                # Try Anthropic invoke_model format (content array with text and thinking blocks)
-                if not content and 'content' in response_body:
-                    content_list = response_body.get('content', [])
-                    content = extract_text_from_content_array(content_list)
-                
-                # Try OpenAI format (choices array)
-                if not content and 'choices' in response_body:
-                    choices = response_body.get('choices', [])
-                    if choices and isinstance(choices, list):
-                        choice = choices[0]
-                        if 'message' in choice:
-                            content = choice['message'].get('content', '')
-                        elif 'text' in choice:
-                            content = choice.get('text', '')
-                
-                # Fallback: try direct text field
-                if not content:
-                    content = response_body.get('text', response_body.get('output', ''))
+                # Build converse API call parameters
+                converse_kwargs = {
+                    'modelId': model_id,
+                    'messages': body['messages'],
+                    'inferenceConfig': body.get('inferenceConfig', {})
+                }
+                # Add system instructions if present (for DeepSeek models)
+                if 'system' in body:
+                    converse_kwargs['system'] = body['system']
+                converse_kwargs.update(self._latency_kwargs(model_id, 'converse'))
                 
-                # Warn if content is still empty after all parsing attempts
-                if not content:
-                    print(f"    [WARNING] No content extracted from response. Response structure: {list(response_body.keys()) if isinstance(response_body, dict) else type(response_body)}")
-                    if isinstance(response_body, dict):
-                        print(f"    [WARNING] Full response (truncated): {str(response_body)[:500]}")
+                response = self.bedrock_runtime.converse(**converse_kwargs)
+                # Converse API returns response directly as a dict
+                response_body = response
+                extract = _extract_converse
                 
-                return {
-                    'success': True,
-                    'content': content,
-                    'model_id': model_id,
-                    'usage': response_body.get('usage', {}),
-                    'attempt': attempt + 1,
-                    'raw_response': response_body  # Include for debugging
-                }
-            
+                # Debug: log response structure
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Response keys: %s", list(response_body.keys()) if isinstance(response_body, dict) else 'Not a dict')
+                    if isinstance(response_body, dict) and 'output' in response_body:
+                        logger.debug("Output keys: %s", list(response_body['output'].keys()) if isinstance(response_body.get('output'), dict) else 'Not a dict')
             except ClientError as e:
-                error_code = e.response.get('Error', {}).get('Code', '')
-                if error_code == 'ThrottlingException' and attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    time.sleep(wait_time)
+                error = e.response.get('Error', {})
+                # Log detailed error for debugging (_retry decides whether it is fatal)
+                logger.warning(
+                    "%s model invocation failed: %s - %s (model %s, inferenceConfig %s)",
+                    model_type, error.get('Code', ''), error.get('Message', ''),
+                    model_id, body.get('inferenceConfig', {})
+                )
+                logger.debug("Full error response: %s", e.response)
+                raise
+            except Exception as e:
+                # Catch any other exceptions
+                logger.error("Unexpected error calling %s model %s: %s: %s", model_type, model_id, type(e).__name__, e)
+                raise
+        elif self._api_for_model.get(model_id) == 'converse':
+            # Already known to need the converse API; skip the failing invoke_model probe
+            response_body = self._converse_from_body(body, model_id, thinking, max_tokens, temperature)
+            extract = _extract_converse
+        else:
+            # Use invoke_model for Anthropic models (supports thinking mode via thinking object in body)
+            try:
+                response = self.bedrock_runtime.invoke_model(
+                    modelId=model_id,
+                    body=_dumps(body),
+                    **self._latency_kwargs(model_id, 'invoke')
+                )
+                response_body = _loads(response['body'].read())
+                extract = _INVOKE_EXTRACTORS.get(model_type, _extract_any)
+            except ClientError as e:
+                # Anything but the on-demand throughput ValidationException goes
+                # back to _retry as-is
+                if _classify_error(e) != "try_converse":
+                    raise
+                # Try using converse API instead (for newer models)
+                response_body = self._converse_from_body(body, model_id, thinking, max_tokens, temperature)
+                extract = _extract_converse
+                # Remember the model needs converse so later calls go there directly
+                self._remember_converse(model_id)
+        
+        # Extract content with the parser for the API format that answered
+        content = extract(response_body)
+        
+        # Warn if content is still empty after all parsing attempts
+        if not content and logger.isEnabledFor(logging.WARNING):
+            logger.warning("No content extracted from response. Response structure: %s", list(response_body.keys()) if isinstance(response_body, dict) else type(response_body))
+            if isinstance(response_body, dict):
+                logger.warning("Full response (truncated): %.500s", response_body)
+        
+        result = {
+            'success': True,
+            'content': content,
+            'model_id': model_id,
+            'usage': response_body.get('usage', {})
+        }
+        if debug:
+            result['raw_response'] = response_body
+        return result
+
+    def _remember_converse(self, model_id: str) -> None:
+        """Record (in memory and on disk) that a model needs the converse API."""
+        self._api_for_model[model_id] = 'converse'
+        with _api_kind_cache_lock:
+            kinds = _load_api_kinds()
+            kinds[model_id] = 'converse'
+            _save_api_kinds(kinds)
+
+    def _converse_from_body(
+        self,
+        body: Dict[str, Any],
+        model_id: str,
+        thinking: bool,
+        max_tokens: int,
+        temperature: float
+    ) -> Dict[str, Any]:
+        """Send an invoke_model request body through the converse API instead (for newer models)."""
+        # Converse API returns response directly, not wrapped in 'body'
+        return self.bedrock_runtime.converse(
+            **self._converse_kwargs_from_body(body, model_id, thinking, max_tokens, temperature)
+        )
+
+    def _converse_kwargs_from_body(
+        self,
+        body: Dict[str, Any],
+        model_id: str,
+        thinking: bool,
+        max_tokens: int,
+        temperature: float
+    ) -> Dict[str, Any]:
+        """Convert an invoke_model request body into converse API arguments."""
+        # Convert to converse API format (the prompt strings are shared, not copied)
+        converse_kwargs = {
+            'modelId': model_id,
+            'messages': [
+                {'role': msg.get('role', 'user'), 'content': [{'text': msg.get('content', '')}]}
+                for msg in body.get('messages', [])
+            ]
+        }
+        
+        system = body.get('system')
+        if isinstance(system, list):
+            # Cached system block; Converse marks the cache point with its own block
+            converse_kwargs['system'] = [{'text': system[0]['text']}, {'cachePoint': {'type': 'default'}}]
+        elif system:
+            converse_kwargs['system'] = [{'text': system}]
+        
+        inference_config = {
+            'maxTokens': body.get('max_tokens', max_tokens)
+        }
+        
+        # Note: thinking mode and temperature are incompatible
+        # If thinking is enabled, don't set temperature
+        if not thinking:
+            inference_config['temperature'] = body.get('temperature', temperature)
+        
+        converse_kwargs['inferenceConfig'] = inference_config
+        converse_kwargs.update(self._latency_kwargs(model_id, 'converse'))
+        
+        # Note: thinking mode may not be supported in converse API fallback
+        # If thinking was requested, log a warning
+        if thinking:
+            logger.warning("Thinking mode requested but falling back to converse API which may not support it")
+        
+        return converse_kwargs
+
+    def _retry(self, fn, model_id: str, max_retries: int) -> Dict[str, Any]:
+        """
+        Run a single-attempt invocation, retrying only on transient errors.
+
+        Args:
+            fn: Zero-argument callable making one attempt and returning its result
+            model_id: Model ID, for error results
+            max_retries: Number of attempts
+
+        Returns:
+            fn's result with the attempt number added, or an error result
+        """
+        for attempt in range(max_retries):
+            try:
+                result = fn()
+            except ClientError as e:
+                if _classify_error(e) == "retry" and attempt < max_retries - 1:
+                    time.sleep(backoff_seconds(attempt, _retry_after(e)))
                     continue
-                else:
-                    return {
-                        'success': False,
-                        'error': str(e),
-                        'error_code': error_code,
-                        'model_id': model_id,
-                        'attempt': attempt + 1
-                    }
-            
-            except requests.exceptions.HTTPError as e:
-                # Handle HTTP errors from bearer token requests
-                error_code = None
-                error_message = str(e)
-                try:
-                    error_body = e.response.json()
-                    error_code = error_body.get('__type', '')
-                    error_message = error_body.get('message', error_body.get('error', str(e)))
-                    # Include full error details for debugging
-                    print(f"    [ERROR] HTTP {e.response.status_code}: {error_message}")
-                    if error_body:
-                        print(f"    [ERROR] Full error response: {error_body}")
-                except:
-                    pass
-                
-                if 'Throttling' in str(e) or '429' in str(e.response.status_code):
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        time.sleep(wait_time)
-                        continue
-                
-                return {
-                    'success': False,
-                    'error': error_message,
-                    'error_code': error_code or f'HTTP_{e.response.status_code}',
-                    'model_id': model_id,
-                    'attempt': attempt + 1
-                }
-            
+                return self._error_result(e, model_id, attempt)
             except Exception as e:
                 return {
                     'success': False,
@@ -837,10 +1306,385 @@ class BedrockClient:
                     'model_id': model_id,
                     'attempt': attempt + 1
                 }
-        
+            result['attempt'] = attempt + 1
+            return result
+
         return {
             'success': False,
             'error': 'Max retries exceeded',
             'model_id': model_id
         }
 
+    def _error_result(self, e: ClientError, model_id: str, attempt: int) -> Dict[str, Any]:
+        """Build the failure result for a ClientError."""
+        return {
+            'success': False,
+            'error': str(e),
+            'error_code': e.response.get('Error', {}).get('Code', ''),
+            'model_id': model_id,
+            'attempt': attempt + 1
+        }
+
+    def invoke_model_stream(
+        self,
+        model_id: str,
+        prompt: str,
+        system_instructions: Optional[str] = None,
+        temperature: float = 0.0,
+        thinking: bool = False,
+        max_tokens: int = 4096
+    ) -> Iterator[str]:
+        """
+        Invoke a Bedrock model and yield the generated text as it arrives.
+
+        A single attempt without tools, retries or caching: errors are raised
+        (e.g. ClientError) rather than returned. Thinking blocks are skipped.
+
+        Args:
+            model_id: The model endpoint identifier
+            prompt: The user prompt
+            system_instructions: Optional system instructions (uses default if None)
+            temperature: Sampling temperature
+            thinking: Enable thinking mode
+            max_tokens: Maximum tokens to generate
+
+        Yields:
+            Chunks of generated text, in order
+        """
+        if system_instructions is None:
+            system_instructions = self.config.default_system_instructions
+        model_id = self.inference_profiles.get(model_id, model_id)
+
+        _, build_body, api = _model_family(model_id)
+        body = build_body(
+            prompt, system_instructions, temperature, thinking, max_tokens, self._prompt_cache(model_id)
+        )
+
+        if api == 'converse':
+            converse_kwargs = {
+                'modelId': model_id,
+                'messages': body['messages'],
+                'inferenceConfig': body.get('inferenceConfig', {})
+            }
+            if 'system' in body:
+                converse_kwargs['system'] = body['system']
+            converse_kwargs.update(self._latency_kwargs(model_id, 'converse'))
+            stream = self.bedrock_runtime.converse_stream(**converse_kwargs)['stream']
+            try:
+                yield from _converse_stream_text(stream)
+            finally:
+                stream.close()
+            return
+
+        if self._api_for_model.get(model_id) != 'converse':
+            try:
+                response = self.bedrock_runtime.invoke_model_with_response_stream(
+                    modelId=model_id,
+                    body=_dumps(body),
+                    **self._latency_kwargs(model_id, 'invoke')
+                )
+            except ClientError as e:
+                if _classify_error(e) != "try_converse":
+                    raise
+                self._remember_converse(model_id)
+            else:
+                stream = response['body']
+                try:
+                    yield from _invoke_stream_text(stream)
+                finally:
+                    stream.close()
+                return
+
+        # Model needs the converse API (newer models)
+        converse_kwargs = self._converse_kwargs_from_body(body, model_id, thinking, max_tokens, temperature)
+        stream = self.bedrock_runtime.converse_stream(**converse_kwargs)['stream']
+        try:
+            yield from _converse_stream_text(stream)
+        finally:
+            stream.close()
+
+    async def invoke_model_async(
+        self,
+        model_id: str,
+        prompt: str,
+        system_instructions: Optional[str] = None,
+        temperature: float = 0.0,
+        thinking: bool = False,
+        max_tokens: int = 4096,
+        max_retries: int = 3,
+        tools: Optional[List[Tool]] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        debug: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Async variant of invoke_model.
+
+        The blocking boto3 call runs on the client's worker pool (boto3 clients
+        are thread-safe), so up to max_concurrency requests can be in flight at
+        once while the event loop waits on the network.
+
+        Returns:
+            The same dictionary invoke_model returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(
+            self.invoke_model,
+            model_id=model_id,
+            prompt=prompt,
+            system_instructions=system_instructions,
+            temperature=temperature,
+            thinking=thinking,
+            max_tokens=max_tokens,
+            max_retries=max_retries,
+            tools=tools,
+            tool_executor=tool_executor,
+            debug=debug
+        ))
+
+    async def invoke_model_stream_async(
+        self,
+        model_id: str,
+        prompt: str,
+        system_instructions: Optional[str] = None,
+        temperature: float = 0.0,
+        thinking: bool = False,
+        max_tokens: int = 4096
+    ) -> AsyncIterator[str]:
+        """
+        Async variant of invoke_model_stream.
+
+        Each blocking read of the event stream runs on the client's worker pool,
+        so the event loop stays free while tokens arrive. Stopping iteration
+        early (or cancelling the consumer) closes the underlying stream; if a
+        read is still running at that point, the stream is closed once the
+        read returns.
+
+        Yields:
+            Chunks of generated text, in order
+        """
+        chunks = self.invoke_model_stream(
+            model_id, prompt, system_instructions, temperature, thinking, max_tokens
+        )
+        done = object()
+        pending = None
+        try:
+            while True:
+                pending = self._executor.submit(next, chunks, done)
+                chunk = await asyncio.wrap_future(pending)
+                pending = None
+                if chunk is done:
+                    return
+                yield chunk
+        finally:
+            if pending is None or pending.cancel():
+                chunks.close()
+            else:
+                # The generator is still executing on a worker thread, and
+                # closing it from here would raise ValueError
+                pending.add_done_callback(lambda _: chunks.close())
+
+    async def invoke_many(
+        self,
+        batch: List[Dict[str, Any]],
+        concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Invoke a batch of requests concurrently.
+
+        Args:
+            batch: List of keyword-argument dicts for invoke_model
+                   (each needs at least model_id and prompt)
+            concurrency: Maximum number of requests in flight at once
+                         (defaults to the client's max_concurrency)
+
+        Returns:
+            List of invoke_model results, in the same order as batch
+
+        Note: requests that use tools should not share a ToolExecutor, since
+        its execution history is per conversation.
+        """
+        if not batch:
+            return []
+
+        loop = asyncio.get_running_loop()
+        if concurrency is None:
+            return await asyncio.gather(*(
+                loop.run_in_executor(self._executor, partial(self.invoke_model, **request))
+                for request in batch
+            ))
+
+        # An explicit fan-out is a cap on the shared pool, not a pool of its own
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def invoke(request):
+            async with semaphore:
+                return await loop.run_in_executor(self._executor, partial(self.invoke_model, **request))
+
+        return await asyncio.gather(*(invoke(request) for request in batch))
+
+    def invoke_many_sync(
+        self,
+        batch: List[Dict[str, Any]],
+        concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Blocking variant of invoke_many, for callers without an event loop.
+
+        Args:
+            batch: List of keyword-argument dicts for invoke_model
+                   (each needs at least model_id and prompt)
+            concurrency: Maximum number of requests in flight at once
+                         (defaults to the client's max_concurrency)
+
+        Returns:
+            List of invoke_model results, in the same order as batch
+        """
+        if not batch:
+            return []
+
+        def invoke(request):
+            return self.invoke_model(**request)
+
+        if concurrency is None:
+            return list(self._executor.map(invoke, batch))
+
+        # As in invoke_many, an explicit fan-out caps the shared pool
+        semaphore = threading.Semaphore(concurrency)
+        futures = []
+        for request in batch:
+            semaphore.acquire()
+            future = self._executor.submit(invoke, request)
+            future.add_done_callback(lambda _: semaphore.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _batch_client(self, service: str):
+        """Return a boto3 client for batch jobs ('bedrock' control plane or 's3'), created on first use."""
+        client = self._batch_clients.get(service)
+        if client is None:
+            client_kwargs = {'region_name': self.config.aws_region}
+            if self._aws_key and self._aws_secret:
+                client_kwargs['aws_access_key_id'] = self._aws_key
+                client_kwargs['aws_secret_access_key'] = self._aws_secret
+            client = self._batch_clients[service] = boto3.client(service, **client_kwargs)
+        return client
+
+    def submit_batch(
+        self,
+        prompts: List[str],
+        model_id: str,
+        output_s3_uri: str,
+        system_instructions: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        job_name: Optional[str] = None
+    ) -> str:
+        """
+        Submit prompts as a Bedrock batch inference job.
+
+        Batch jobs cost about half as much as on-demand calls but take minutes
+        to hours, so they suit large offline runs. Bedrock requires a minimum
+        number of records per job (typically 100) and the aws.batch_role_arn
+        service role. Only invoke_model families (Anthropic, OpenAI) are
+        supported, since batch records use the invoke_model body format.
+
+        Args:
+            prompts: User prompts, one record each
+            model_id: The model endpoint identifier
+            output_s3_uri: s3:// prefix for the job's input manifest and output
+            system_instructions: Optional system instructions (uses default if None)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            job_name: Job name (defaults to a timestamped one)
+
+        Returns:
+            The job ARN, for poll_batch
+        """
+        role_arn = self.config.batch_role_arn
+        if not role_arn:
+            raise ValueError("aws.batch_role_arn must be set to submit batch jobs")
+        if system_instructions is None:
+            system_instructions = self.config.default_system_instructions
+        model_id = self.inference_profiles.get(model_id, model_id)
+        _, build_body, api = _model_family(model_id)
+        if api != 'invoke':
+            raise ValueError(f"Batch inference is not supported for converse models: {model_id}")
+
+        job_name = job_name or f"curator-batch-{int(time.time())}"
+        output_s3_uri = output_s3_uri.rstrip('/') + '/'
+        bucket, prefix = _split_s3_uri(output_s3_uri)
+        input_key = f"{prefix}{job_name}/input.jsonl"
+
+        manifest = "\n".join(
+            json.dumps({
+                "recordId": f"{i:08d}",
+                "modelInput": build_body(
+                    prompt, system_instructions, temperature, False, max_tokens, self._prompt_cache(model_id)
+                )
+            })
+            for i, prompt in enumerate(prompts)
+        )
+        self._batch_client('s3').put_object(Bucket=bucket, Key=input_key, Body=manifest.encode('utf-8'))
+
+        response = self._batch_client('bedrock').create_model_invocation_job(
+            jobName=job_name,
+            roleArn=role_arn,
+            modelId=model_id,
+            inputDataConfig={'s3InputDataConfig': {'s3Uri': f"s3://{bucket}/{input_key}"}},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': output_s3_uri}}
+        )
+        logger.info("Submitted batch job %s (%d records)", response['jobArn'], len(prompts))
+        return response['jobArn']
+
+    def poll_batch(self, job_arn: str, poll_interval: float = 60.0) -> List[Dict[str, Any]]:
+        """
+        Wait for a batch job from submit_batch to finish and collect its results.
+
+        Args:
+            job_arn: ARN returned by submit_batch
+            poll_interval: Seconds between status checks
+
+        Returns:
+            One dictionary per returned record, ordered by prompt index, with
+            prompt_idx, success, and content and usage or error
+        """
+        bedrock = self._batch_client('bedrock')
+        while True:
+            job = bedrock.get_model_invocation_job(jobIdentifier=job_arn)
+            status = job['status']
+            if status in ('Completed', 'PartiallyCompleted'):
+                break
+            if status in ('Failed', 'Stopped', 'Expired'):
+                raise RuntimeError(f"Batch job {job_arn} {status.lower()}: {job.get('message', '')}")
+            time.sleep(poll_interval)
+
+        # Bedrock writes <input file>.jsonl.out under <output prefix>/<job id>/
+        bucket, prefix = _split_s3_uri(job['outputDataConfig']['s3OutputDataConfig']['s3Uri'])
+        prefix = f"{prefix.rstrip('/')}/{job_arn.rsplit('/', 1)[-1]}/".lstrip('/')
+
+        s3 = self._batch_client('s3')
+        results = []
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                if not obj['Key'].endswith('.jsonl.out'):
+                    continue
+                lines = s3.get_object(Bucket=bucket, Key=obj['Key'])['Body'].iter_lines()
+                for line in lines:
+                    if not line:
+                        continue
+                    record = _loads(line)
+                    result = {'prompt_idx': int(record['recordId'])}
+                    output = record.get('modelOutput')
+                    if output:
+                        # The job reports modelId as an ARN, so tell the formats apart by shape
+                        extract = _extract_openai if 'choices' in output else _extract_anthropic
+                        result['success'] = True
+                        result['content'] = extract(output)
+                        result['usage'] = output.get('usage', {})
+                    else:
+                        result['success'] = False
+                        result['content'] = None
+                        result['error'] = record.get('error', {}).get('errorMessage', 'No model output')
+                    results.append(result)
+        results.sort(key=lambda r: r['prompt_idx'])
+        return results
@@ -41,6 +41,26 @@ class Config:
         """Get default model endpoint."""
         return self._config['aws']['default_model']
     
+    @property
+    def inference_profiles(self) -> Dict[str, str]:
+        """Get the map of base model IDs to cross-region inference profile IDs."""
+        return self._config['aws'].get('inference_profiles') or {}
+    
+    @property
+    def enable_prompt_cache(self) -> bool:
+        """Get whether long system prompts are marked for Bedrock prompt caching."""
+        return self._config['aws'].get('enable_prompt_cache', True)
+    
+    @property
+    def latency_optimized(self) -> bool:
+        """Get whether to request latency-optimized inference where Bedrock offers it."""
+        return self._config['aws'].get('latency_optimized', False)
+    
+    @property
+    def batch_role_arn(self) -> Optional[str]:
+        """Get the IAM service role ARN Bedrock batch inference jobs run as."""
+        return self._config['aws'].get('batch_role_arn')
+    
     @property
     def default_system_instructions(self) -> str:
         """Get default system instructions."""
@@ -51,6 +71,16 @@ class Config:
         """Get experiment configuration."""
         return self._config['experiment']
     
+    @property
+    def max_concurrency(self) -> int:
+        """Get the maximum number of concurrent model requests."""
+        return self._config['experiment'].get('max_concurrency', 32)
+    
+    @property
+    def timeout_seconds(self) -> int:
+        """Get the maximum time to wait for a single model response."""
+        return self._config['experiment'].get('timeout_seconds', 300)
+    
     def get_aws_access_key(self) -> str:
         """Get AWS access key from environment."""
         return os.getenv('AWS_ACCESS_KEY_ID', '')
@@ -226,8 +226,12 @@ class Experiment:
         else:
             print(f"    No schema file found for this task")
         
+        # The first sample of the first task gets debug output (and the raw response)
+        is_first_task = task.name == list(self._get_all_tasks())[0].name
+        
         for idx, sample in enumerate(input_samples):
             print(f"    Processing sample {idx + 1}/{len(input_samples)}...", end=' ', flush=True)
+            debug_sample = is_first_task and idx == 0
             
             # Get ground truth for this sample if available
             ground_truth = None
@@ -254,7 +258,8 @@ class Experiment:
                 max_tokens=experiment_config.get('max_tokens', 4096),
                 max_retries=experiment_config.get('max_retries', 3),
                 tools=active_tools if active_tools else None,
-                tool_executor=active_tool_executor
+                tool_executor=active_tool_executor,
+                debug=debug_sample
             )
             
             # Initialize score to None
@@ -269,7 +274,7 @@ class Experiment:
                     ground_truth_dict = ground_truth_samples[idx]
                     
                     # Debug output for first sample of first task
-                    if idx == 0 and task.name == list(self._get_all_tasks())[0].name:
+                    if debug_sample:
                         print(f"\n    [DEBUG] Sample {idx + 1} - Prediction (first 200 chars):")
                         print(f"    {prediction_content[:200] if prediction_content else '(empty)'}...")
                         print(f"    [DEBUG] Ground truth: {ground_truth_dict}")
@@ -66,7 +66,8 @@ class ModelClient:
         max_tokens: int = 4096,
         max_retries: int = 3,
         tools: Optional[List[Tool]] = None,
-        tool_executor: Optional[ToolExecutor] = None
+        tool_executor: Optional[ToolExecutor] = None,
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Invoke a model with the given parameters.
@@ -83,6 +84,7 @@ class ModelClient:
             max_retries: Number of retry attempts
             tools: Optional list of Tool objects to make available to the model
             tool_executor: Optional ToolExecutor for handling tool calls (required if tools provided)
+            debug: Include the raw API response in the result as 'raw_response'
             
         Returns:
             Dictionary containing the response and metadata
@@ -103,5 +105,6 @@ class ModelClient:
             max_tokens=max_tokens,
             max_retries=max_retries,
             tools=tools,
-            tool_executor=tool_executor
+            tool_executor=tool_executor,
+            debug=debug
         )
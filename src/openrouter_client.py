@@ -6,6 +6,7 @@ from typing import Dict, Any, Optional, List
 from .config import Config
 from .tool import Tool
 from .tool_executor import ToolExecutor
+from .utils import backoff_seconds
 
 
 class OpenRouterClient:
@@ -80,7 +81,8 @@ class OpenRouterClient:
         max_tokens: int,
         max_retries: int,
         tools: List[Tool],
-        tool_executor: ToolExecutor
+        tool_executor: ToolExecutor,
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Invoke model with tools, handling tool use flow.
@@ -165,12 +167,11 @@ class OpenRouterClient:
                         tool_use_id = result.get('toolUseId')
                         
                         # Extract result content
-                        result_content = ""
-                        for content_item in result.get('content', []):
-                            if isinstance(content_item, dict):
-                                result_content += content_item.get('text', '')
-                            elif isinstance(content_item, str):
-                                result_content += content_item
+                        result_content = "".join(
+                            content_item.get('text', '') if isinstance(content_item, dict) else content_item
+                            for content_item in result.get('content', [])
+                            if isinstance(content_item, (dict, str))
+                        )
                         
                         messages.append({
                             "role": "tool",
@@ -191,7 +192,7 @@ class OpenRouterClient:
                 # Extract usage information
                 usage = response_body.get('usage', {})
                 
-                return {
+                result = {
                     'success': True,
                     'content': content,
                     'model_id': model_id,
@@ -201,15 +202,16 @@ class OpenRouterClient:
                         'totalTokens': usage.get('total_tokens', 0)
                     },
                     'attempt': attempt + 1,
-                    'raw_response': response_body,
                     'tool_calls': all_tool_calls,
                     'tool_execution_history': tool_executor.get_execution_history()
                 }
+                if debug:
+                    result['raw_response'] = response_body
+                return result
             
             except requests.exceptions.HTTPError as e:
                 if e.response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
+                    time.sleep(backoff_seconds(attempt, e.response.headers.get('Retry-After')))
                     continue
                 else:
                     return {
@@ -246,7 +248,8 @@ class OpenRouterClient:
         max_tokens: int = 4096,
         max_retries: int = 3,
         tools: Optional[List[Tool]] = None,
-        tool_executor: Optional[ToolExecutor] = None
+        tool_executor: Optional[ToolExecutor] = None,
+        debug: bool = False
     ) -> Dict[str, Any]:
         """
         Invoke an OpenRouter model with the given parameters.
@@ -261,6 +264,7 @@ class OpenRouterClient:
             max_retries: Number of retry attempts
             tools: Optional list of Tool objects to make available to the model
             tool_executor: Optional ToolExecutor for handling tool calls (required if tools provided)
+            debug: Include the raw API response in the result as 'raw_response'
             
         Returns:
             Dictionary containing the response and metadata
@@ -278,7 +282,8 @@ class OpenRouterClient:
                 max_tokens=max_tokens,
                 max_retries=max_retries,
                 tools=tools,
-                tool_executor=tool_executor
+                tool_executor=tool_executor,
+                debug=debug
             )
         
         # Standard invocation without tools
@@ -327,7 +332,7 @@ class OpenRouterClient:
                 # Extract usage information
                 usage = response_body.get('usage', {})
                 
-                return {
+                result = {
                     'success': True,
                     'content': content,
                     'model_id': model_id,
@@ -336,14 +341,15 @@ class OpenRouterClient:
                         'outputTokens': usage.get('completion_tokens', 0),
                         'totalTokens': usage.get('total_tokens', 0)
                     },
-                    'attempt': attempt + 1,
-                    'raw_response': response_body
+                    'attempt': attempt + 1
                 }
+                if debug:
+                    result['raw_response'] = response_body
+                return result
             
             except requests.exceptions.HTTPError as e:
                 if e.response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
+                    time.sleep(backoff_seconds(attempt, e.response.headers.get('Retry-After')))
                     continue
                 else:
                     error_message = str(e)
@@ -3,6 +3,10 @@ from typing import Dict, Any, Optional, List
 import json
 import re
 
+# Markdown code fences stripped from predictions before JSON extraction
+_JSON_FENCE_RE = re.compile(r'```json\s*\n?')
+_FENCE_RE = re.compile(r'```\s*\n?')
+
 
 class Scorer:
     """Handles scoring of predictions against ground truth."""
@@ -18,8 +22,9 @@ class Scorer:
             Extracted JSON string, or None if no JSON found
         """
         # Remove markdown code blocks (```json ... ``` or ``` ... ```)
-        text = re.sub(r'```json\s*\n?', '', text)
-        text = re.sub(r'```\s*\n?', '', text)
+        if '```' in text:
+            text = _JSON_FENCE_RE.sub('', text)
+            text = _FENCE_RE.sub('', text)
         text = text.strip()
         
         # Try to find JSON object boundaries
@@ -1,6 +1,8 @@
 """Task management for benchmarking."""
+import importlib.util
 import json
 import pandas as pd
+import yaml
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
@@ -47,7 +49,6 @@ class Task:
         """Load task configuration if it exists."""
         config_path = self.task_dir / "task_config.yaml"
         if config_path.exists():
-            import yaml
             with open(config_path, 'r') as f:
                 return yaml.safe_load(f)
         return {}
@@ -128,7 +129,6 @@ class Task:
         """Load JSON schema if it exists."""
         schema_path = self.task_dir / "schema.json"
         if schema_path.exists():
-            import json
             with open(schema_path, 'r') as f:
                 return json.load(f)
         return None
@@ -148,7 +148,6 @@ class Task:
         format_prompt_path = self.task_dir / "format_prompt.py"
         if format_prompt_path.exists():
             try:
-                import importlib.util
                 spec = importlib.util.spec_from_file_location(
                     f"{self.name}_format_prompt",
                     format_prompt_path
@@ -166,7 +165,6 @@ class Task:
         format_prompt_path = self.task_dir / "format_prompt.py"
         if format_prompt_path.exists():
             try:
-                import importlib.util
                 spec = importlib.util.spec_from_file_location(
                     f"{self.name}_format_prompt",
                     format_prompt_path
@@ -212,7 +210,6 @@ class Task:
         score_path = self.task_dir / "score.py"
         if score_path.exists():
             try:
-                import importlib.util
                 spec = importlib.util.spec_from_file_location(
                     f"{self.name}_score",
                     score_path
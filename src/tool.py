@@ -1,5 +1,6 @@
 """Tool management for LLM experiments."""
 import json
+import requests
 from typing import Dict, Any, Optional, List, Callable
 from abc import ABC, abstractmethod
 from pathlib import Path
@@ -13,6 +14,10 @@ class Tool(ABC):
     Each tool must define its schema (OpenAPI format) and implement execution logic.
     """
     
+    # Tools whose calls must not overlap with other calls in the same model turn
+    # (e.g. ones with side effects) set this to True
+    sequential = False
+    
     def __init__(self, name: str, description: str):
         """
         Initialize a tool.
@@ -232,16 +237,20 @@ class ToolRegistry:
             func_path = tool_def.get('function_path')
             if func_path:
                 # Load function from file
-                return self._load_function_tool(name, description, func_path, tool_def)
+                tool = self._load_function_tool(name, description, func_path, tool_def)
             else:
                 # Inline function definition (for simple tools)
-                return self._create_inline_function_tool(name, description, tool_def)
+                tool = self._create_inline_function_tool(name, description, tool_def)
         elif tool_type == 'api':
             # API-based tool
-            return self._create_api_tool(name, description, tool_def)
+            tool = self._create_api_tool(name, description, tool_def)
         else:
             print(f"Warning: Unknown tool type '{tool_type}' for tool '{name}'")
             return None
+        
+        if tool is not None and tool_def.get('sequential'):
+            tool.sequential = True
+        return tool
     
     def _load_function_tool(self, name: str, description: str, func_path: str, tool_def: Dict[str, Any]) -> Optional[Tool]:
         """Load a function-based tool from a Python file."""
@@ -343,8 +352,6 @@ class APITool(Tool):
     def execute(self, parameters: Dict[str, Any]) -> Any:
         """Execute the API call with given parameters."""
         try:
-            import requests
-            
             if self.api_method.upper() == 'GET':
                 response = requests.get(self.api_url, params=parameters, timeout=10)
             elif self.api_method.upper() == 'POST':
@@ -1,5 +1,6 @@
 """Tool execution handler for LLM tool calls."""
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from .tool import Tool, ToolRegistry
 
@@ -14,14 +15,16 @@ class ToolExecutor:
     3. Returns the result in a format the LLM can use
     """
     
-    def __init__(self, tool_registry: ToolRegistry):
+    def __init__(self, tool_registry: ToolRegistry, max_parallel: int = 5):
         """
         Initialize tool executor.
         
         Args:
             tool_registry: Registry containing available tools
+            max_parallel: Maximum number of tool calls from one model turn to run at once
         """
         self.tool_registry = tool_registry
+        self.max_parallel = max_parallel
         self.execution_history: List[Dict[str, Any]] = []
     
     def execute_tool_call(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
@@ -40,6 +43,19 @@ class ToolExecutor:
                 - status: 'success' or 'error'
                 - content: Result content (list of text blocks for Bedrock format)
         """
+        result, record = self._run_tool_call(tool_call)
+        if record is not None:
+            self.execution_history.append(record)
+        return result
+    
+    def _run_tool_call(self, tool_call: Dict[str, Any]):
+        """
+        Run one tool call without touching the execution history (safe to call from worker threads).
+        
+        Returns:
+            Tuple of (tool result as returned by execute_tool_call, execution
+            history record or None)
+        """
         tool_name = tool_call.get('name')
         tool_use_id = tool_call.get('toolUseId')
         parameters = tool_call.get('input', {})
@@ -49,21 +65,20 @@ class ToolExecutor:
                 "toolUseId": tool_use_id or "unknown",
                 "status": "error",
                 "content": [{"text": "Tool name missing from tool call"}]
-            }
+            }, None
         
         tool = self.tool_registry.get(tool_name)
         if not tool:
             error_msg = f"Tool '{tool_name}' not found in registry"
-            self.execution_history.append({
-                "tool_name": tool_name,
-                "tool_use_id": tool_use_id,
-                "status": "error",
-                "error": error_msg
-            })
             return {
                 "toolUseId": tool_use_id or "unknown",
                 "status": "error",
                 "content": [{"text": error_msg}]
+            }, {
+                "tool_name": tool_name,
+                "tool_use_id": tool_use_id,
+                "status": "error",
+                "error": error_msg
             }
         
         try:
@@ -77,47 +92,60 @@ class ToolExecutor:
                 result_text = str(result)
             
             # Record successful execution
-            self.execution_history.append({
+            return {
+                "toolUseId": tool_use_id or "unknown",
+                "status": "success",
+                "content": [{"text": result_text}]
+            }, {
                 "tool_name": tool_name,
                 "tool_use_id": tool_use_id,
                 "parameters": parameters,
                 "status": "success",
                 "result": result
-            })
-            
-            return {
-                "toolUseId": tool_use_id or "unknown",
-                "status": "success",
-                "content": [{"text": result_text}]
             }
         except Exception as e:
             error_msg = f"Error executing tool '{tool_name}': {str(e)}"
-            self.execution_history.append({
+            return {
+                "toolUseId": tool_use_id or "unknown",
+                "status": "error",
+                "content": [{"text": error_msg}]
+            }, {
                 "tool_name": tool_name,
                 "tool_use_id": tool_use_id,
                 "parameters": parameters,
                 "status": "error",
                 "error": error_msg
-            })
-            return {
-                "toolUseId": tool_use_id or "unknown",
-                "status": "error",
-                "content": [{"text": error_msg}]
             }
     
     def execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Execute multiple tool calls.
         
+        Independent calls run concurrently (up to max_parallel at once), so a
+        turn takes as long as its slowest tool rather than the sum of them.
+        Turns that include a tool marked sequential run one call at a time.
+        
         Args:
             tool_calls: List of tool call requests
             
         Returns:
-            List of tool results in Bedrock format
+            List of tool results in Bedrock format, in the same order as tool_calls
+            (each tool result is matched to its call by position)
         """
+        if len(tool_calls) <= 1 or self.max_parallel <= 1 or any(
+            getattr(self.tool_registry.get(tool_call.get('name')), 'sequential', False)
+            for tool_call in tool_calls
+        ):
+            return [self.execute_tool_call(tool_call) for tool_call in tool_calls]
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(tool_calls))) as pool:
+            outcomes = list(pool.map(self._run_tool_call, tool_calls))
+        
+        # Record history in call order, whatever order the tools finished in
         results = []
-        for tool_call in tool_calls:
-            result = self.execute_tool_call(tool_call)
+        for result, record in outcomes:
+            if record is not None:
+                self.execution_history.append(record)
             results.append(result)
         return results
     
@@ -1,8 +1,13 @@
 """Utility functions for the benchmarking framework."""
+import random
 import shutil
 from pathlib import Path
 from typing import List, Optional
 
+# Retry backoff: a random wait of up to _RETRY_BASE * 2^attempt, capped at _RETRY_MAX
+_RETRY_BASE = 1.0
+_RETRY_MAX = 30.0
+
 
 def organize_existing_task_files(
     source_dir: Path,
@@ -66,3 +71,18 @@ def organize_existing_task_files(
     print(f"Organized task files into: {task_dir}")
     return task_dir
 
+
+def backoff_seconds(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Seconds to wait before retrying a failed model call (shared by the Bedrock
+    and OpenRouter clients).
+
+    Capped exponential backoff with full jitter (so concurrent workers hitting
+    the same throttle spread their retries out), but never shorter than the
+    server's Retry-After, if it sent one.
+    """
+    try:
+        server_wait = float(retry_after) if retry_after else 0.0
+    except ValueError:
+        server_wait = 0.0  # HTTP-date form; fall back to our own backoff
+    return max(server_wait, random.uniform(0, min(_RETRY_MAX, _RETRY_BASE * (2 ** attempt))))
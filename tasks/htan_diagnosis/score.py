@@ -1,7 +1,26 @@
 """Custom scorer for HTAN data correction task using hybrid metric."""
 import json
 import re
-from typing import Dict, Any, Optional, Set
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON schema types that are always scored by exact match
+_STRUCTURED_TYPES = frozenset(("integer", "number", "boolean"))
+
+# Markdown code fences stripped from predictions before JSON extraction
+_JSON_FENCE_RE = re.compile(r'```json\s*\n?')
+_FENCE_RE = re.compile(r'```\s*\n?')
+
+# (field types, text field names) per schema object; the schema is kept
+# alive so its id stays unique, and only the most recent schemas are kept
+# (a run scores one task's schema, so this never grows past a handful)
+_SCHEMA_CACHE_SIZE = 8
+_field_types_cache: Dict[int, Tuple[Dict[str, Any], Tuple[Dict[str, str], FrozenSet[str]]]] = {}
 
 
 def jaccard_similarity(text1: str, text2: str) -> float:
@@ -16,22 +35,25 @@ def jaccard_similarity(text1: str, text2: str) -> float:
     if not text1 or not text2:
         return 0.0
 
-    # Normalize: lowercase, split on whitespace
-    words1 = set(str(text1).lower().split())
-    words2 = set(str(text2).lower().split())
+    # Normalize: lowercase, split on whitespace (text2 is the ground truth,
+    # whose values repeat across samples, so its word set is cached)
+    words1 = frozenset(str(text1).lower().split())
+    words2 = _word_set(str(text2))
 
     if not words1 and not words2:
         return 1.0
     if not words1 or not words2:
         return 0.0
 
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
+    # |A ∪ B| = |A| + |B| - |A ∩ B|, so the union set is never built
+    intersection = len(words1 & words2)
+    return intersection / (len(words1) + len(words2) - intersection)
 
-    if not union:
-        return 0.0
 
-    return len(intersection) / len(union)
+@lru_cache(maxsize=4096)
+def _word_set(text: str) -> FrozenSet[str]:
+    """Lowercased word set of a text value."""
+    return frozenset(text.lower().split())
 
 
 def classify_field_type(prop_name: str, prop_schema: Dict[str, Any]) -> str:
@@ -51,7 +73,7 @@ def classify_field_type(prop_name: str, prop_schema: Dict[str, Any]) -> str:
 
     # Check for numeric/boolean types
     prop_type = prop_schema.get("type", "string")
-    if prop_type in ["integer", "number", "boolean"]:
+    if prop_type in _STRUCTURED_TYPES:
         return "structured"
 
     # Check for arrays with enum items
@@ -65,31 +87,87 @@ def classify_field_type(prop_name: str, prop_schema: Dict[str, Any]) -> str:
 
 
 def load_field_types(schema: Dict[str, Any]) -> Dict[str, str]:
-    """Build field type mapping from schema properties."""
+    """Build field type mapping from schema properties (classified once per schema)."""
+    return _classify_schema(schema)[0]
+
+
+def _text_fields(schema: Dict[str, Any]) -> FrozenSet[str]:
+    """Names of the schema's free-text fields; every other key is exact-match."""
+    return _classify_schema(schema)[1]
+
+
+def _classify_schema(schema: Dict[str, Any]) -> Tuple[Dict[str, str], FrozenSet[str]]:
+    """Classify a schema's fields once and cache the result on the schema object."""
+    cached = _field_types_cache.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
     field_types = {}
     properties = schema.get("properties", {})
 
     for prop_name, prop_schema in properties.items():
         field_types[prop_name] = classify_field_type(prop_name, prop_schema)
 
-    return field_types
+    classified = (
+        field_types,
+        frozenset(name for name, field_type in field_types.items() if field_type == "text")
+    )
+    if len(_field_types_cache) >= _SCHEMA_CACHE_SIZE:
+        del _field_types_cache[next(iter(_field_types_cache))]
+    _field_types_cache[id(schema)] = (schema, classified)
+    return classified
+
+
+def _parse_json(text: str) -> Any:
+    """
+    Parse JSON text, with orjson when it is installed.
+
+    orjson is stricter than the json module (no NaN/Infinity, no lone
+    surrogates), so anything it rejects goes through json.loads and is
+    scored exactly as before.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
 
 
 def _extract_json(text: str) -> Optional[str]:
-    """Extract JSON from text, handling markdown code blocks."""
-    # Remove markdown code blocks
-    text = re.sub(r'```json\s*\n?', '', text)
-    text = re.sub(r'```\s*\n?', '', text)
+    """
+    Extract the JSON object from text, handling markdown code blocks.
+
+    Returns None when the text has no {...} span, since it cannot hold an
+    object and parsing it would be wasted work.
+    """
+    # Remove markdown code blocks (skipped when there are no fences at all)
+    if '```' in text:
+        text = _JSON_FENCE_RE.sub('', text)
+        text = _FENCE_RE.sub('', text)
     text = text.strip()
 
     # Try to find JSON object boundaries
-    start = text.find('{')
-    end = text.rfind('}')
+    span = _find_json_span(text)
+    if span is None:
+        return None
+    return text[span[0]:span[1]]
+
 
-    if start != -1 and end != -1 and end > start:
-        return text[start:end+1]
+def _find_json_span(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Return (start, end) slice indices from the first '{' to the last '}'.
 
-    return text
+    Both scans run in C; the reverse scan is skipped when there is no '{'
+    and stops at the opening brace. Returns None if there is no such span.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    end = text.rfind('}', start)
+    if end == -1:
+        return None
+    return start, end + 1
 
 
 def score(
@@ -106,14 +184,14 @@ def score(
     Returns weighted average across all fields.
     """
     try:
-        # Extract JSON from prediction
+        # Extract JSON from prediction (no object at all scores 0)
         json_str = _extract_json(prediction)
-        if not json_str:
+        if json_str is None:
             return 0.0
 
         # Parse prediction
         try:
-            pred_dict = json.loads(json_str)
+            pred_dict = _parse_json(json_str)
         except (json.JSONDecodeError, TypeError):
             return 0.0
 
@@ -122,23 +200,26 @@ def score(
         if input_data and "_schema" in input_data:
             schema = input_data["_schema"]
 
-        # Classify field types
-        field_types = load_field_types(schema) if schema else {}
+        # Free-text fields (everything else, including fields missing from the
+        # schema or all fields if there is no schema, is structured)
+        text_fields = _text_fields(schema) if schema else frozenset()
 
         # Calculate scores per field
         all_keys = set(pred_dict.keys()) | set(ground_truth.keys())
         if not all_keys:
             return 1.0
 
+        if not text_fields:
+            # Exact match on every field: the score is the fraction of matches
+            matches = sum(1 for key in all_keys if pred_dict.get(key) == ground_truth.get(key))
+            return matches / len(all_keys)
+
         field_scores = []
         for key in all_keys:
             pred_val = pred_dict.get(key)
             truth_val = ground_truth.get(key)
 
-            # Determine field type (default to structured if schema not available)
-            field_type = field_types.get(key, "structured")
-
-            if field_type == "structured":
+            if key not in text_fields:
                 # Exact match for structured fields
                 if pred_val == truth_val:
                     field_scores.append(1.0)
@@ -1,6 +1,105 @@
 """Custom prompt formatter for HTAN correction tasks."""
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Schema text per schema object (the schema is kept alive so its id stays
+# unique); only the most recent schemas are kept
+_SCHEMA_CACHE_SIZE = 8
+_schema_text_cache: Dict[int, Tuple[Dict[str, Any], str]] = {}
+
+
+def _dumps_indented(obj: Any) -> str:
+    """
+    Same text as json.dumps(obj, indent=2), via orjson when it is installed.
+
+    orjson writes non-ASCII characters unescaped, so that case goes through
+    json.dumps to keep the prompt text identical.
+    """
+    if orjson is not None:
+        try:
+            text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+            if text.isascii():
+                return text
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, indent=2)
+
+
+def _simplified_schema_text(schema: Dict[str, Any]) -> str:
+    """
+    Build the "Target Schema" prompt section for a schema.
+
+    The schema is the same for every sample of a task, so the text is built
+    once per schema object and reused.
+    """
+    cached = _schema_text_cache.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    simplified_schema = {
+        "type": "object",
+        "properties": {}
+    }
+
+    properties = schema["properties"]
+    for prop_name, prop_def in properties.items():
+        field_info = {
+            "type": prop_def.get("type", "string")
+        }
+
+        # Add description (truncated)
+        if "description" in prop_def:
+            desc = prop_def["description"]
+            field_info["description"] = desc[:100] + "..." if len(desc) > 100 else desc
+
+        # Include enum values (limit to 20 if very large)
+        if "enum" in prop_def:
+            enum_values = prop_def["enum"]
+            if len(enum_values) > 20:
+                field_info["enum_preview"] = enum_values[:20]
+                field_info["enum_count"] = len(enum_values)
+                field_info["enum_note"] = f"Controlled vocabulary with {len(enum_values)} values. First 20 shown."
+            else:
+                field_info["enum"] = enum_values
+
+        # Include pattern for ID validation
+        if "pattern" in prop_def:
+            field_info["pattern"] = prop_def["pattern"]
+
+        # Include range constraints
+        if "minimum" in prop_def:
+            field_info["minimum"] = prop_def["minimum"]
+        if "maximum" in prop_def:
+            field_info["maximum"] = prop_def["maximum"]
+
+        # Include array item constraints
+        if "items" in prop_def and prop_def.get("type") == "array":
+            items = prop_def["items"]
+            if "enum" in items:
+                enum_values = items["enum"]
+                if len(enum_values) > 20:
+                    field_info["items_enum_preview"] = enum_values[:20]
+                    field_info["items_enum_count"] = len(enum_values)
+                else:
+                    field_info["items_enum"] = enum_values
+
+        simplified_schema["properties"][prop_name] = field_info
+
+    # Add required fields info
+    if "required" in schema:
+        simplified_schema["required"] = schema["required"]
+
+    schema_text = f"\n\nTarget Schema:\n{_dumps_indented(simplified_schema)}"
+
+    if len(_schema_text_cache) >= _SCHEMA_CACHE_SIZE:
+        del _schema_text_cache[next(iter(_schema_text_cache))]
+    _schema_text_cache[id(schema)] = (schema, schema_text)
+    return schema_text
 
 
 def format_prompt(
@@ -20,60 +119,7 @@ def format_prompt(
     # Build simplified schema showing key validation rules
     schema_text = ""
     if schema and "properties" in schema:
-        simplified_schema = {
-            "type": "object",
-            "properties": {}
-        }
-
-        properties = schema["properties"]
-        for prop_name, prop_def in properties.items():
-            field_info = {
-                "type": prop_def.get("type", "string")
-            }
-
-            # Add description (truncated)
-            if "description" in prop_def:
-                desc = prop_def["description"]
-                field_info["description"] = desc[:100] + "..." if len(desc) > 100 else desc
-
-            # Include enum values (limit to 20 if very large)
-            if "enum" in prop_def:
-                enum_values = prop_def["enum"]
-                if len(enum_values) > 20:
-                    field_info["enum_preview"] = enum_values[:20]
-                    field_info["enum_count"] = len(enum_values)
-                    field_info["enum_note"] = f"Controlled vocabulary with {len(enum_values)} values. First 20 shown."
-                else:
-                    field_info["enum"] = enum_values
-
-            # Include pattern for ID validation
-            if "pattern" in prop_def:
-                field_info["pattern"] = prop_def["pattern"]
-
-            # Include range constraints
-            if "minimum" in prop_def:
-                field_info["minimum"] = prop_def["minimum"]
-            if "maximum" in prop_def:
-                field_info["maximum"] = prop_def["maximum"]
-
-            # Include array item constraints
-            if "items" in prop_def and prop_def.get("type") == "array":
-                items = prop_def["items"]
-                if "enum" in items:
-                    enum_values = items["enum"]
-                    if len(enum_values) > 20:
-                        field_info["items_enum_preview"] = enum_values[:20]
-                        field_info["items_enum_count"] = len(enum_values)
-                    else:
-                        field_info["items_enum"] = enum_values
-
-            simplified_schema["properties"][prop_name] = field_info
-
-        # Add required fields info
-        if "required" in schema:
-            simplified_schema["required"] = schema["required"]
-
-        schema_text = f"\n\nTarget Schema:\n{json.dumps(simplified_schema, indent=2)}"
+        schema_text = _simplified_schema_text(schema)
 
     # Format input data
     sample_text = f"\n\nInput Data (with errors to correct):\n{json.dumps(sample, indent=2)}"
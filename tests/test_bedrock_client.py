@@ -0,0 +1,171 @@
+"""Tests for Bedrock request bodies built by BedrockClient."""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from src import bedrock_client
+from src.bedrock_client import BedrockClient, PROMPT_CACHE_MIN_CHARS
+from src.config import Config
+from src.tool import Tool, ToolRegistry
+from src.tool_executor import ToolExecutor
+
+
+class FakeRuntime:
+    """Stand-in bedrock-runtime client that records invoke_model bodies."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self.bodies.append(json.loads(body))
+        payload = json.dumps({"content": [{"type": "text", "text": "ok"}], "usage": {}}).encode()
+
+        class Body:
+            def read(self):
+                return payload
+
+        return {"body": Body()}
+
+
+class SlowStream:
+    """invoke_model_with_response_stream body that blocks after its first chunk until released."""
+
+    def __init__(self):
+        self.reading = threading.Event()
+        self.release = threading.Event()
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for text in ("a", "b"):
+            delta = {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}}
+            yield {"chunk": {"bytes": json.dumps(delta).encode()}}
+            self.reading.set()
+            self.release.wait(5)
+
+    def close(self):
+        self.closed.set()
+
+
+class LargeTool(Tool):
+    """Tool whose schema is long enough to be worth caching."""
+
+    def get_schema(self):
+        return {"type": "object", "description": "x" * PROMPT_CACHE_MIN_CHARS}
+
+    def execute(self, parameters):
+        return "ok"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(bedrock_client, "API_KIND_CACHE_PATH", tmp_path / "api_cache.json")
+    client = BedrockClient(Config())
+    client.bedrock_runtime = FakeRuntime()
+    with client:
+        yield client
+
+
+def _invoke_with_tools(client, model_id):
+    tools = [LargeTool("lookup", "Look something up")]
+    registry = ToolRegistry()
+    registry.register(tools[0])
+    result = client.invoke_model(
+        model_id,
+        "prompt",
+        system_instructions="s" * PROMPT_CACHE_MIN_CHARS,
+        tools=tools,
+        tool_executor=ToolExecutor(registry),
+        max_retries=1
+    )
+    assert result["success"]
+    return client.bedrock_runtime.bodies[-1]
+
+
+def test_no_cache_control_for_model_without_prompt_caching(client):
+    body = _invoke_with_tools(client, "anthropic.claude-3-haiku-20240307-v1:0")
+    assert "cache_control" not in json.dumps(body)
+    assert isinstance(body["system"], str)
+
+
+def test_cache_control_for_model_with_prompt_caching(client):
+    body = _invoke_with_tools(client, "us.anthropic.claude-sonnet-4-20250514-v1:0")
+    assert body["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_unknown_provider_response_falls_back_to_any_format(client):
+    payload = json.dumps({"choices": [{"message": {"content": "from choices"}}]}).encode()
+
+    class Body:
+        def read(self):
+            return payload
+
+    client.bedrock_runtime.invoke_model = lambda **kwargs: {"body": Body()}
+    result = client.invoke_model("mistral.mistral-large-2407-v1:0", "prompt", max_retries=1)
+    assert result["success"]
+    assert result["content"] == "from choices"
+
+
+def test_close_shuts_down_worker_threads(client):
+    assert client.invoke_many_sync([{"model_id": "anthropic.claude-3-haiku-20240307-v1:0", "prompt": "p"}])[0]["success"]
+    client.close()
+    with pytest.raises(RuntimeError):
+        client._executor.submit(print)
+
+
+def test_cancelled_async_stream_is_closed_after_pending_read(client):
+    stream = SlowStream()
+    client.bedrock_runtime.invoke_model_with_response_stream = lambda **kwargs: {"body": stream}
+
+    async def main():
+        chunks = []
+
+        async def consume():
+            async for chunk in client.invoke_model_stream_async("anthropic.claude-3-haiku-20240307-v1:0", "prompt"):
+                chunks.append(chunk)
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.get_running_loop().run_in_executor(None, stream.reading.wait, 5)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return chunks
+
+    assert asyncio.run(main()) == ["a"]
+    assert not stream.closed.is_set()
+    stream.release.set()
+    assert stream.closed.wait(5)
+
+
+def test_invoke_many_caps_requests_in_flight(client):
+    runtime = client.bedrock_runtime
+    invoke = runtime.invoke_model
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def slow_invoke(**kwargs):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        try:
+            threading.Event().wait(0.02)
+            return invoke(**kwargs)
+        finally:
+            with lock:
+                in_flight.pop()
+
+    runtime.invoke_model = slow_invoke
+    batch = [{"model_id": "anthropic.claude-3-haiku-20240307-v1:0", "prompt": str(i)} for i in range(8)]
+    results = asyncio.run(client.invoke_many(batch, concurrency=2))
+    assert all(result["success"] for result in results)
+    assert max(peak) <= 2
+
+    peak.clear()
+    batch = [dict(request, prompt=f"sync {i}") for i, request in enumerate(batch)]
+    results = client.invoke_many_sync(batch, concurrency=3)
+    assert [result["success"] for result in results] == [True] * len(batch)
+    assert max(peak) <= 3